@@ -38,6 +38,7 @@ The basic routines are very versatile as well as optimized and allow to
 easily create new exporters for other formats.
 """
 import sys
+import re
 import datetime
 
 import numpy as np
@@ -840,8 +841,7 @@ def writeData(fil, data, fmt=None, sep='', end='\n'):
         ncols = data.shape[-1]
         val = data.reshape(-1, ncols)
         template = sep.join([fmt] * ncols) + end
-        for v in val:
-            writeText(fil, template % tuple(v))
+        _writeRows(fil, template, val)
 
 
 def writeIData(fil, data, fmt, ind=1, sep=' ', end='\n'):
@@ -897,8 +897,32 @@ def writeIData(fil, data, fmt, ind=1, sep=' ', end='\n'):
         if ind.shape[0] != nrows:
             raise ValueError("Index should have same length as data")
     template = "%d  " + sep.join([fmt] * ncols) + end
-    for i, v in zip(ind, val):
-        writeText(fil, template % (i, *v))
+    _writeRows(fil, template, val, ind)
+
+
+def _writeRows(fil, template, val, ind=None, chunk=10000):
+    """Write the rows of a 2D array to an open file.
+
+    Each row is formatted with the template, preceded by its index
+    from ind if that is provided. The rows are formatted in chunks,
+    each with a single format operation, which is a lot faster than
+    formatting them one by one. The data are converted to Python ints
+    or floats, which format the same with numerical converters. If the
+    template contains string converters, float data keep their numpy
+    type, so that e.g. '%s' formats float32 values as before.
+    """
+    aslist = val.dtype.kind in 'biu' or not re.search(r'%[^%a-z]*[sra]',
+                                                     template)
+    for i in range(0, val.shape[0], chunk):
+        rows = val[i:i+chunk]
+        if ind is None:
+            items = rows.ravel()
+            items = items.tolist() if aslist else list(items)
+        else:
+            items = [x for k, v in zip(ind[i:i+chunk].tolist(),
+                                       rows.tolist() if aslist else rows)
+                     for x in (k, *v)]
+        writeText(fil, (template * rows.shape[0]) % tuple(items))
 
 
 def writeText(fil, text):
@@ -83,6 +83,19 @@ Palette = {
 }
 
 
+def _stuur(x, xval, yval, exp):
+    """Vectorized version of :func:`arraytools.stuur` for an array x."""
+    xmin, x0, xmax = xval
+    ymin, y0, ymax = yval
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xlo = (x-x0) / (xmin-x0)
+        xhi = (x-x0) / (xmax-x0)
+        return np.where(x < xmin, ymin,
+                        np.where(x < x0, y0 + (ymin-y0) * xlo**exp,
+                                 np.where(x < xmax, y0 + (ymax-y0) * xhi**exp,
+                                          ymax)))
+
+
 class ColorScale():
     """Mapping floating point values into colors.
 
@@ -209,6 +222,38 @@ class ColorScale():
         return tuple([(1.-x)*p + x*q for p, q in zip(c0, c1)])
 
 
+    def colors(self, vals):
+        """Return the colors representing an array of values.
+
+        Parameters:
+
+        - `vals`: float :term:`array_like`: numerical values to be scaled.
+
+        This is a vectorized version of :meth:`color`, returning the
+        same colors for all the values at once. It is much faster than
+        calling :meth:`color` for each value when there are many values.
+
+        Returns a float array with shape ``vals.shape + (3,)`` holding the
+        RGB values of the colors.
+        """
+        vals = np.asarray(vals, dtype=float)
+        if self.exp2 is None:
+            x = _stuur(vals, [self.xmin, self.x0, self.xmax], [-1., 0., 1.],
+                       self.exp)
+        else:
+            x = np.where(
+                vals < self.x0,
+                _stuur(vals, [self.xmin, (self.x0+self.xmin)/2, self.x0],
+                       [-1., -0.5, 0.], self.exp2),
+                _stuur(vals, [self.x0, (self.x0+self.xmax)/2, self.xmax],
+                       [0., 0.5, 1.0], self.exp))
+        palet = np.array(self.palet, dtype=float)
+        x = x[..., np.newaxis]
+        c1 = np.where(x < 0., palet[0], palet[2])
+        x = abs(x)
+        return (1.-x) * palet[1] + x * c1
+
+
 class ColorLegend():
     """A colorlegend divides a ColorScale in a number of subranges.
 
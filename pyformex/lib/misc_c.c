@@ -1318,6 +1318,213 @@ static PyObject * isosurface(PyObject *dummy, PyObject *args)
 }
 
 
+/**************************************************** earclip ****/
+/* Ear clipping triangulation of a polygon */
+
+typedef struct {
+  double c;
+  int i;
+} angle_index;
+
+/* Compare two angle_index items on their angle, for qsort */
+static int cmp_angle(const void *a, const void *b)
+{
+  double ca = ((const angle_index *)a)->c;
+  double cb = ((const angle_index *)b)->c;
+  return (ca > cb) - (ca < cb);
+}
+
+/* Pseudo internal angle at vertex b of the path a,b,c */
+/* The value is in [0,4[ and increases with the angle in [0,360[ */
+/* A value 2.0 corresponds with an angle of 180 degrees */
+static double pseudo_angle(float *xy, int a, int b, int c)
+{
+  double u0,u1,v0,v1,cross,dot,s,r;
+  u0 = xy[2*b] - xy[2*a];
+  u1 = xy[2*b+1] - xy[2*a+1];
+  v0 = xy[2*c] - xy[2*b];
+  v1 = xy[2*c+1] - xy[2*b+1];
+  cross = u0*v1 - u1*v0;
+  dot = u0*v0 + u1*v1;
+  s = fabs(cross) + fabs(dot);
+  if (s == 0.0) return 2.0;
+  r = cross / s;
+  if (dot >= 0.0) return 2.0 - r;
+  else if (cross >= 0.0) return r;
+  else return 4.0 + r;
+}
+
+/* Check whether point p is inside (or on) the triangle i,j,k */
+static int inside_triangle(float *xy, int i, int j, int k, int p)
+{
+  double d1,d2,d3;
+  d1 = (xy[2*j]-xy[2*i]) * (xy[2*p+1]-xy[2*i+1]) -
+    (xy[2*j+1]-xy[2*i+1]) * (xy[2*p]-xy[2*i]);
+  d2 = (xy[2*k]-xy[2*j]) * (xy[2*p+1]-xy[2*j+1]) -
+    (xy[2*k+1]-xy[2*j+1]) * (xy[2*p]-xy[2*j]);
+  d3 = (xy[2*i]-xy[2*k]) * (xy[2*p+1]-xy[2*k+1]) -
+    (xy[2*i+1]-xy[2*k+1]) * (xy[2*p]-xy[2*k]);
+  return (d1 >= 0.0 && d2 >= 0.0 && d3 >= 0.0) ||
+    (d1 <= 0.0 && d2 <= 0.0 && d3 <= 0.0);
+}
+
+/* Fill the anticlockwise polygon xy (n,2) with triangles tri (n-2,3) */
+/* Returns the number of triangles created, or -1 if out of memory */
+static int ear_clip(float *xy, int n, int *tri)
+{
+  int *nxt,*prv,i,j,k,l,m,p,na,ok,ntri;
+  char *alive;
+  double *c;
+  angle_index *srt;
+
+  nxt = (int *) malloc(n*sizeof(int));
+  prv = (int *) malloc(n*sizeof(int));
+  alive = (char *) malloc(n*sizeof(char));
+  c = (double *) malloc(n*sizeof(double));
+  srt = (angle_index *) malloc(n*sizeof(angle_index));
+  if (!nxt || !prv || !alive || !c || !srt) {
+    ntri = -1;
+    goto done;
+  }
+
+  for (p=0; p<n; p++) {
+    nxt[p] = (p+1) % n;
+    prv[p] = (p-1+n) % n;
+    alive[p] = 1;
+  }
+  for (p=0; p<n; p++) c[p] = pseudo_angle(xy,prv[p],p,nxt[p]);
+
+  i = j = k = 0;
+  ntri = 0;
+  m = n;
+  while (m > 3) {
+    /* try the ears in order of increasing angle */
+    na = 0;
+    for (p=0; p<n; p++) {
+      if (alive[p]) {
+	srt[na].c = c[p];
+	srt[na].i = p;
+	na++;
+      }
+    }
+    qsort(srt,na,sizeof(angle_index),cmp_angle);
+    for (l=0; l<na; l++) {
+      j = srt[l].i;
+      if (c[j] > 2.0) goto done;   /* stuck */
+      i = prv[j];
+      k = nxt[j];
+      /* only reflex vertices can be inside the ear */
+      ok = 1;
+      for (p=0; p<n; p++) {
+	if (alive[p] && p!=i && p!=j && p!=k && c[p] >= 2.0 &&
+	    inside_triangle(xy,i,j,k,p)) {
+	  ok = 0;
+	  break;
+	}
+      }
+      if (ok) break;
+    }
+    /* if no valid ear was found, the last one tried is used */
+    tri[3*ntri] = i;
+    tri[3*ntri+1] = j;
+    tri[3*ntri+2] = k;
+    nxt[i] = k;
+    prv[k] = i;
+    alive[j] = 0;
+    c[i] = pseudo_angle(xy,prv[i],i,k);
+    c[k] = pseudo_angle(xy,i,k,nxt[k]);
+    m--;
+    ntri++;
+  }
+  for (j=0; !alive[j]; j++);
+  tri[3*ntri] = j;
+  tri[3*ntri+1] = nxt[j];
+  tri[3*ntri+2] = nxt[nxt[j]];
+  ntri++;
+
+ done:
+  free(nxt);
+  free(prv);
+  free(alive);
+  free(c);
+  free(srt);
+  return ntri;
+}
+
+
+static char earclip_doc[] = "\
+earclip(xy)\n\
+\n\n\
+Fill a polygon with triangles by ear clipping.\n\
+\n\
+Parameters\n\
+----------\n\
+xy: float32 array (n, 2)\n\
+    The x,y coordinates of the n vertices of the polygon, in order.\n\
+    The polygon should be turning anticlockwise and n should be at least 3.\n\
+\n\
+Returns\n\
+-------\n\
+tri: int32 array (n-2, 3)\n\
+    The vertex numbers of the triangles filling the polygon.\n\
+ntri: int\n\
+    The number of triangles that could be created. This is less than\n\
+    n-2 if the algorithm got stuck, e.g. on a self-intersecting polygon.\n\
+    Only the first ntri rows of tri are valid then; the others are -1.\n\
+\n\
+See Also\n\
+--------\n\
+:meth:`plugins.polygon.Polygon.fill`: the user oriented method to use this\n\
+";
+
+static PyObject * earclip(PyObject *dummy, PyObject *args)
+{
+  PyObject *arg1=NULL, *ret=NULL;
+  PyObject *arr1=NULL;
+  float *xy;
+  int *tri;
+  int n,ntri,i;
+  if (!PyArg_ParseTuple(args, "O", &arg1)) return NULL;
+  arr1 = PyArray_FROM_OTF(arg1, NPY_FLOAT, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+  if (arr1 == NULL) return NULL;
+
+  npy_intp * dim;
+  dim = PYARRAY_DIMS(arr1);
+  if (PyArray_NDIM((PyArrayObject *)arr1) != 2 || dim[1] != 2 || dim[0] < 3) {
+    PyErr_SetString(PyExc_ValueError, "Expected a (n,2) array with n >= 3");
+    goto fail;
+  }
+  n = dim[0];
+  xy = (float *)PYARRAY_DATA(arr1);
+
+  /* create return array */
+  npy_intp newdim[2];
+  newdim[0] = n-2;
+  newdim[1] = 3;
+  ret = PyArray_SimpleNew(2,newdim, NPY_INT);
+  if (ret == NULL) goto fail;
+  tri = (int *)PYARRAY_DATA(ret);
+  for (i=0; i<3*(n-2); i++) tri[i] = -1;
+
+  /* compute */
+  Py_BEGIN_ALLOW_THREADS
+  ntri = ear_clip(xy,n,tri);
+  Py_END_ALLOW_THREADS
+  if (ntri < 0) {
+    Py_DECREF(ret);
+    Py_DECREF(arr1);
+    return PyErr_NoMemory();
+  }
+
+  /* Clean up and return */
+  Py_DECREF(arr1);
+  return Py_BuildValue("Ni",ret,ntri);
+ fail:
+  Py_XDECREF(arr1);
+  return NULL;
+}
+
+
 /********************************************************/
 /* The methods defined in this module */
 static PyMethodDef extension_methods[] = {
@@ -1327,6 +1534,7 @@ static PyMethodDef extension_methods[] = {
   {"averageDirectionIndexed", averageDirectionIndexed, METH_VARARGS, "_Average directions."},
   {"isoline", isoline, METH_VARARGS, isoline_doc},
   {"isosurface", isosurface, METH_VARARGS, isosurface_doc},
+  {"earclip", earclip, METH_VARARGS, earclip_doc},
   {NULL, NULL, 0, NULL}        /* Sentinel */
 };
 
@@ -28,15 +28,16 @@
 
 """
 
+import time
+
 import pyformex as pf
 from pyformex import utils
+from pyformex import Path
 from pyformex.gui import menu
 
-from pyformex.core import *
-from pyformex.gui.draw import *
-
 
 def about():
+    from pyformex.gui.draw import showInfo
     showInfo("""Jobs.py
 
 This is pyFormex plugin allowing the user to
@@ -56,6 +57,8 @@ access to the host system.
 
 
 def configure():
+    from pyformex.gui import widgets
+    from pyformex.gui.draw import _I
     from pyformex.gui.menus.Settings import updateSettings
 
     dia = None
@@ -102,19 +105,81 @@ def configure():
     dia.show()
 
 
-def getRemoteDirs(host, userdir):
+def _ssh_opts():
+    """Return the ssh options to share a single connection per host.
+
+    All remote operations go through an OpenSSH ControlMaster socket,
+    so that only the first one pays for the full connection setup.
+    """
+    return ['-o', 'ControlMaster=auto',
+            '-o', 'ControlPath=/tmp/pyformex-ssh-%r@%h:%p',
+            '-o', 'ControlPersist=600']
+
+
+def closeRemote(host):
+    """Close the shared ssh connection to host, if any."""
+    P = utils.command(['ssh', *_ssh_opts(), '-O', 'exit', host], verbose=False)
+    return P.returncode
+
+
+# Cache of remote directory listings: (host, userdir) -> (time, dirs)
+_remote_dirs_cache = {}
+
+
+def getRemoteDirs(host, userdir, use_cache=True, ttl=30.0):
     """Get a list of all subdirs in userdir on host.
 
     The host should be a machine where the user has ssh access.
     The userdir is relative to the user's home dir.
+
+    Successful listings are cached per (host, userdir) for `ttl` seconds,
+    to avoid an ssh round trip each time the list is requested.
+    Set `use_cache` False to force a fresh listing from the host.
     """
-    cmd = "ssh %s 'cd %s;ls -F|egrep \".*/\"'" % (host, userdir)
-    P = utils.command(cmd, shell=True)
-    if P.returncode:
+    key = (host, userdir)
+    if use_cache and key in _remote_dirs_cache:
+        stamp, dirs = _remote_dirs_cache[key]
+        if time.monotonic() - stamp < ttl:
+            return list(dirs)
+    if utils.Module.has('asyncssh'):
+        dirs = _sftpRemoteDirs(host, userdir)
+    else:
+        # ls -d */ only lists the directories: no need for a filter
+        cmd = 'cd %s && ls -1d */ 2>/dev/null' % userdir
+        P = utils.command(['ssh', *_ssh_opts(), host, cmd])
+        if P.returncode:
+            dirs = None
+        else:
+            dirs = [j.rstrip('/') for j in P.stdout.splitlines() if j]
+    if dirs is None:
         dirs = []
+        _remote_dirs_cache.pop(key, None)
     else:
-        dirs = [j.strip('/') for j in P.stdout.split('\n')]
-    return dirs
+        _remote_dirs_cache[key] = (time.monotonic(), dirs)
+    return list(dirs)
+
+
+def _sftpRemoteDirs(host, userdir):
+    """Get the subdirs in userdir on host with a single SFTP listing.
+
+    This requires the asyncssh module. Returns None if the listing failed.
+    """
+    import asyncio
+    import stat
+    import asyncssh
+
+    async def listdirs():
+        async with asyncssh.connect(host) as conn:
+            async with conn.start_sftp_client() as sftp:
+                return [a.filename for a in await sftp.readdir(userdir)
+                        if a.filename not in ('.', '..')
+                        and stat.S_ISDIR(a.attrs.permissions or 0)]
+
+    try:
+        return asyncio.run(listdirs())
+    except (OSError, asyncssh.Error) as e:
+        print("Error listing %s:%s: %s" % (host, userdir, e))
+        return None
 
 
 ## def getRemoteFiles(host,userdir):
@@ -135,15 +200,45 @@ def getRemoteDirs(host, userdir):
 def transferFiles(host, userdir, files, targetdir):
     """Copy files from userdir on host to targetdir.
 
-    files is a list of file names.
+    files is a list of file names. All files are copied with a single
+    scp command over the shared ssh connection.
     """
     files = ['%s:%s/%s' % (host, userdir.rstrip('/'), f) for f in files]
-    cmd = "scp %s %s" % (' '.join(files), targetdir)
-    P = utils.command(cmd)
+    P = utils.command(['scp', *_ssh_opts(), *files, str(targetdir)])
     return P.returncode
 
 
-def rsyncFiles(srcdir, tgtdir, include=['*'], exclude=[], exclude_first=False, rsh='ssh -q', chmod='ug+rwX,o-rwx', opts='-rv'):
+def transferFilesAsync(host, userdir, files, targetdir):
+    """Copy files from userdir on host to targetdir, concurrently.
+
+    This is like :func:`transferFiles`, but uses the asyncssh module
+    to fetch all files in parallel over a single SFTP channel.
+    Each file transfer also pipelines its read requests, which pays off
+    on high latency connections.
+
+    Returns 0 on success, 1 if some file could not be copied.
+    """
+    import asyncio
+    import asyncssh
+
+    async def get_all():
+        async with asyncssh.connect(host) as conn:
+            async with conn.start_sftp_client() as sftp:
+                await asyncio.gather(*[
+                    sftp.get('%s/%s' % (userdir.rstrip('/'), f),
+                             str(Path(targetdir) / f),
+                             block_size=32768, max_requests=128)
+                    for f in files])
+
+    try:
+        asyncio.run(get_all())
+    except (OSError, asyncssh.Error) as e:
+        print("Error in transfer from %s: %s" % (host, e))
+        return 1
+    return 0
+
+
+def rsyncFiles(srcdir, tgtdir, include=['*'], exclude=[], exclude_first=False, rsh=None, chmod='ug+rwX,o-rwx', opts='-rv'):
     """Transfer files remotely using rsync
 
     Parameters:
@@ -157,7 +252,8 @@ def rsyncFiles(srcdir, tgtdir, include=['*'], exclude=[], exclude_first=False, r
       remote directory (if `srcdir` does not contain one).
     - `include`: list of strings: files to include in the copying process.
     - `exclude`: list of strings: files to exclude from the copying process.
-    - `rsh`: string: the remote shell command to be used.
+    - `rsh`: string: the remote shell command to be used. The default
+      is a quiet ssh sharing the connection with the other remote commands.
     - `chmod`: string: the permissions settings on the target system.
     - `opts`: string: the
 
@@ -183,12 +279,15 @@ def rsyncFiles(srcdir, tgtdir, include=['*'], exclude=[], exclude_first=False, r
     - You need to have rsync installed on source and target systems.
 
     """
-    include = ' '.join(["--include '%s'" % i for i in include])
-    exclude = ' '.join(["--exclude '%s'" % i for i in exclude])
+    if rsh is None:
+        rsh = ' '.join(['ssh', '-q', *_ssh_opts()])
+    include = ['--include=%s' % i for i in include]
+    exclude = ['--exclude=%s' % i for i in exclude]
     if exclude_first:
         include, exclude = exclude, include
-    cmd = "rsync -e '%s' --chmod=%s %s %s %s/ %s %s" % (rsh, chmod, include, exclude, srcdir, tgtdir, opts)
-    P = utils.command(cmd, shell=True)
+    args = ['rsync', '-e', rsh, '--chmod=%s' % chmod, *include, *exclude,
+            str(srcdir).rstrip('/') + '/', str(tgtdir), *opts.split()]
+    P = utils.command(args)
     return P
 
 
@@ -210,15 +309,16 @@ def submitJob(srcdir, tgtdir, include=[], delete_old=True):
       submitJob('myjobdir/jobname','bumpfs1:bumper/requests/jobname')
 
     """
+    # Old files are removed by the same rsync that copies the job files.
+    # The request file is excluded there, so it is deleted as well and
+    # only copied by the final rsync.
+    opts = '-rv'
     if delete_old:
-        P = rsyncFiles(srcdir, tgtdir, include=[], exclude=['*'], exclude_first=True, opts=' -rv --delete --delete-excluded')
-        if P.returncode:
-            pf.warning("Could not delete old files from request folder!")
-
+        opts += ' --delete --delete-excluded'
     if include:
-        P = rsyncFiles(srcdir, tgtdir, include=include, exclude=['*'])
+        P = rsyncFiles(srcdir, tgtdir, include=include, exclude=['*'], opts=opts)
     else:
-        P = rsyncFiles(srcdir, tgtdir, exclude=['*.request'], include=include, exclude_first=True)
+        P = rsyncFiles(srcdir, tgtdir, exclude=['*.request'], include=include, exclude_first=True, opts=opts)
     if P.returncode:
         print(P.stdout)
     else:
@@ -233,6 +333,7 @@ def remoteCommand(host=None, command=None):
     host: the hostname where the command is executed
     command: the command line
     """
+    from pyformex.gui.draw import askItems, _I
     if host is None or command is None:
         res = askItems(
             [_I('host', choices=['bumpfs', 'bumpfs2', '--other--']),
@@ -249,7 +350,7 @@ def remoteCommand(host=None, command=None):
         command = res['command']
 
     if host and command:
-        P = utils.command(['ssh', host, command])
+        P = utils.command(['ssh', *_ssh_opts(), host, command])
         print(P.stdout)
         return P.returncode
 
@@ -261,6 +362,7 @@ def runLocalProcessor(filename='', processor='abaqus'):
     If a filename is specified and is not an absolute path name,
     it is relative to the current directory.
     """
+    from pyformex.gui.draw import askFilename
     if filename:
         filename = Path(filename)
     else:
@@ -272,8 +374,7 @@ def runLocalProcessor(filename='', processor='abaqus'):
         cmd = pf.cfg['jobs/cmd_%s' % processor]
         cmd = cmd.replace('$F', jobname)
         cmd = cmd.replace('$C', cpus)
-        cmd = "cd %s;%s" % (dirname, cmd)
-        P = utils.command(cmd, shell=True)
+        P = utils.command(cmd, cwd=dirname)
         print(P.stdout)
 
 
@@ -286,6 +387,7 @@ def runLocalCalculix(filename=''):
 
 def submitToCluster(filename=None):
     """Submit an Abaqus job to the cluster."""
+    from pyformex.gui.draw import askFilename, askItems, _I
     if filename:
         filename = Path(filename)
     else:
@@ -293,7 +395,7 @@ def submitToCluster(filename=None):
     if filename:
         jobname = filename.stem
         dirname = filename.parent
-        add_all = jobname == dirname
+        add_all = jobname == dirname.name
         res = askItems([
             _I('jobname', jobname, text='Cluster job name/directory'),
             _I('add_all', add_all, text='Include all the files in the input directory', tooltip='If unchecked, only the jobname.inp and jobname.request files comprise the job'),
@@ -310,8 +412,8 @@ def submitToCluster(filename=None):
             reqdir = pf.cfg['jobs/inputdir']
 
             filereq = filename.with_suffix('.request')
-            with filereq.open('w') as fil:
-                fil.write(reqtxt)
+            if not filereq.exists() or filereq.read_text() != reqtxt:
+                filereq.write_text(reqtxt)
 
             srcdir = dirname
             tgtdir = "%s:%s/%s" % (host, reqdir, jobname)
@@ -324,6 +426,7 @@ def submitToCluster(filename=None):
 
 def killClusterJob(jobname=None):
     """Kill a job to the cluster."""
+    from pyformex.gui.draw import askItems
     res = askItems([('jobname', '')])
     if res:
         jobname = res['jobname']
@@ -332,7 +435,7 @@ def killClusterJob(jobname=None):
         cmd = "touch %s/%s.kill" % (reqdir, jobname)
         print(host)
         print(cmd)
-        P = utils.command(['ssh', host, "%s" % cmd])
+        P = utils.command(['ssh', *_ssh_opts(), host, cmd])
         print(P.stdout)
 
 
@@ -342,18 +445,21 @@ the_jobnames = None
 the_jobname = None
 
 
-def checkResultsOnServer(host=None, userdir=None):
+def checkResultsOnServer(host=None, userdir=None, refresh=False):
     """Get a list of job results from the cluster.
 
     Specify userdir='bumper/running' to get a list of running jobs.
+    Recent listings are reused from cache, unless `refresh` is True.
     """
     global the_host, the_userdir, the_jobnames
+    from pyformex.gui.draw import askItems, _I
     if host is None or userdir is None:
         res = askItems([
             _I('host', choices=['bumpfs', 'bumpfs2', 'other']),
             _I('other', '', text='Other host name'),
             _I('status', choices=['results', 'running', 'custom']),
             _I('userdir', 'bumper/results/', text='Custom user directory'),
+            _I('refresh', refresh, text='Refresh the list from the server'),
         ], enablers=[
             ('status', 'custom', 'userdir')
         ])
@@ -367,8 +473,9 @@ def checkResultsOnServer(host=None, userdir=None):
             userdir = 'bumper/%s/' % status
         else:
             userdir = res['userdir']
+        refresh = res['refresh']
 
-    jobnames = getRemoteDirs(host, userdir)
+    jobnames = getRemoteDirs(host, userdir, use_cache=not refresh)
     if jobnames:
         the_host = host
         the_userdir = userdir
@@ -388,6 +495,7 @@ def changeTargetDir(field):
 def getResultsFromServer(jobname=None, targetdir=None, ext=['.fil']):
     """Get results back from cluster."""
     global the_jobname
+    from pyformex.gui.draw import askItems, busyCursor, mkdir, _I
     print("getRESULTS")
     if targetdir is None:
         targetdir = pf.cfg['workdir']
@@ -421,12 +529,18 @@ def getResultsFromServer(jobname=None, targetdir=None, ext=['.fil']):
                 targetdir = targetdir / jobname
                 mkdir(targetdir)
             ext = [e for e in ['.fil', '.post.py', '.odb'] if res[e]]
-            res += [e for e in res['other'] if e.startswith('.')]
+            ext.extend(e for e in res['other'] if e.startswith('.'))
+            # Do not fetch the same file twice
+            ext = list(dict.fromkeys(ext))
     if jobname and ext:
         files = ['%s%s' % (jobname, e) for e in ext]
         userdir = "%s/%s" % (userdir, jobname)
         with busyCursor():
-            if transferFiles(host, userdir, files, targetdir) == 0:
+            if utils.Module.has('asyncssh'):
+                transfer = transferFilesAsync
+            else:
+                transfer = transferFiles
+            if transfer(host, userdir, files, targetdir) == 0:
                 the_jobname = jobname
                 print("Files successfully transfered")
 
@@ -32,9 +32,10 @@ import numpy as np
 
 import pyformex as pf
 from pyformex import Path
+from pyformex import arraytools as at
 from pyformex import colors
 from pyformex import geomtools
-from pyformex.opengl import decors
+from pyformex.gui import QtCore
 from pyformex.gui import draw as ps
 
 inverse = np.linalg.linalg.inv
@@ -53,44 +54,118 @@ def prepare(V):
     return V, P, N
 
 
-def testview(F, V, P):
-    global VA, waiting
+def testview(F, V, P, N0):
+    """Let the user position the cut plane and return its point and normal.
+
+    N0 is the normal of the prepared plane V, as returned by :func:`prepare`.
+    """
+    global VA
     p = np.array(pf.canvas.camera.focus)
-    waiting = True
-    while waiting:
-        pf.app.processEvents()
+    # Block until the user signals that the plane has been positioned
+    loop = QtCore.QEventLoop()
+    pf.GUI.signals.WAKEUP.connect(loop.quit)
+    loop.exec_()
+    pf.GUI.signals.WAKEUP.disconnect(loop.quit)
     p -= np.array(pf.canvas.camera.focus)
     print("TRANSLATE: %s" % p)
     m = pf.canvas.camera.getRot()
     P += p
     print("TOTAL TRANSLATE: %s" % P)
-    V = V.affine(inverse(m[0:3, 0:3])).translate(-P)
+    A = inverse(m[0:3, 0:3])
+    V = V.affine(A).translate(-P)
     print(V.center())
     print(F.center())
     ps.undraw(VA)
-    VA = draw(V)
-    area, norm = geomtools.areaNormals(V.coords)
-    N = np.norm[0]
+    VA = ps.draw(V)
+    # Transform the normal with the inverse transpose of the affine matrix
+    N = at.normalize(np.dot(N0, inverse(A).T))
     return P, N
 
 
-def colorCut(F, P, N, prop):
-    """Color a Formex in two by a plane (P,N)"""
-    print(F.bbox())
-    print(P)
-    print(N)
-    print(prop)
-    dist = F.distanceFromPlane(P, N)
-    print(dist)
-    right = np.any(dist>0.0, axis=1)
-    print(right)
+def colorCut(F, P, N, prop, scratch=None):
+    """Color a Formex in two by a plane (P,N)
+
+    If a dict `scratch` is provided, it is used to store work arrays
+    that can be reused in subsequent calls on the same Formex.
+    """
+    pf.debug("colorCut: P=%s, N=%s, prop=%s" % (P, N, prop), pf.DEBUG.MISC)
+    # Only the sign of the distance matters: no need to normalize N
+    P = np.asarray(P, dtype=float).reshape(3)
+    N = np.asarray(N, dtype=float).reshape(3)
+    nelems, nplex = F.coords.shape[:2]
+    if scratch is None:
+        scratch = {}
+    if scratch.get('dist') is None or scratch['dist'].shape != (nelems*nplex,):
+        scratch['dist'] = np.empty((nelems*nplex,), dtype=float)
+        scratch['dmax'] = np.empty((nelems,), dtype=float)
+        scratch['right'] = np.empty((nelems,), dtype=bool)
+    dist, dmax, right = scratch['dist'], scratch['dmax'], scratch['right']
+    np.dot(F.coords.reshape(-1, 3), N, out=dist)
+    np.subtract(dist, P.dot(N), out=dist)
+    # An element is right if any of its points is at the positive side
+    np.max(dist.reshape(nelems, nplex), axis=1, out=dmax)
+    np.greater(dmax, 0.0, out=right)
     F.prop[right] = prop
     nright = right.sum()
-    nleft = F.nelems() - nright
+    nleft = nelems - nright
     print("Left part has %s elements, right part has %s elements" % (nleft, nright))
     return F
 
 
+def colorCutsBatch(F, planes, prop=0):
+    """Color a Formex by a sequence of cut planes in a single pass.
+
+    This gives the same result as successive calls of :func:`colorCut`
+    with props prop+1, prop+2, ..., but computes the distances to all
+    planes at once.
+
+    Parameters
+    ----------
+    F: Formex
+        The Formex to color. Its prop values are changed in place.
+    planes: float :term:`array_like` (nplanes,2,3)
+        The cut planes, each defined by a point and a normal.
+    prop: int
+        The prop value for the elements that are not right of any plane.
+        Elements right of plane i get prop + i + 1, where i is the
+        last plane that has the element at its right.
+
+    Returns
+    -------
+    Formex
+        The input Formex with updated prop values.
+
+    Examples
+    --------
+    >>> from pyformex.formex import Formex
+    >>> F = Formex([[[i, 0, 0], [i+0.5, 0, 0]] for i in range(4)])
+    >>> planes = [[(1, 0, 0), (1, 0, 0)], [(2.2, 0, 0), (1, 0, 0)],
+    ...           [(0.2, 0, 0), (-1, 0, 0)]]
+    >>> print(colorCutsBatch(F, planes).prop)
+    [3 1 2 2]
+
+    This is the same as cutting with one plane at a time:
+
+    >>> G = Formex(F.coords).setProp(0)
+    >>> for i, (P, N) in enumerate(planes):
+    ...     G = colorCut(G, P, N, prop=i+1)
+    Left part has 1 elements, right part has 3 elements
+    Left part has 2 elements, right part has 2 elements
+    Left part has 3 elements, right part has 1 elements
+    >>> print(G.prop)
+    [3 1 2 2]
+    """
+    planes = np.asarray(planes, dtype=float).reshape(-1, 2, 3)
+    P, N = planes[:, 0], planes[:, 1]
+    nelems, nplex = F.coords.shape[:2]
+    dist = F.coords.reshape(-1, 3).dot(N.T) - (P*N).sum(axis=1)
+    right = dist.reshape(nelems, nplex, -1).max(axis=1) > 0.0
+    # index of the last plane having the element at its right
+    last = right.shape[1] - 1 - np.argmax(right[:, ::-1], axis=1)
+    F.setProp(np.where(right.any(axis=1), prop + 1 + last, prop))
+    return F
+
+
 def splitProp(G, name):
     """Partition a Formex according to its prop values and export the results.
 
@@ -98,19 +173,14 @@ def splitProp(G, name):
     to the property values, and the (compacted) parts are exported
     with names 'name-propnumber'.
     """
-    split = G.splitProp(compact=True)
-    if split:
-        names = ['%s-%s' % (name, i) for i in np.unique(G.prop)]
+    props = G.propSet()
+    if len(props) > 0:
+        # Split with the same prop values that are used for the names
+        split = [G.select(G.prop==p, compact=True) for p in props]
+        names = ['%s-%s' % (name, p) for p in props]
         ps.export2(names, split)
 
 
-waiting = True
-
-def wakeup():
-    global waiting
-    waiting = False
-
-
 def partition(Fin, prop=0):
     """Interactively partition a Formex.
 
@@ -127,7 +197,8 @@ def partition(Fin, prop=0):
     If you wish to restore the original properties, you should copy them
     (or the input Formex) before calling this function.
     """
-    global FA, VA, waiting
+    from pyformex.opengl import decors
+    global FA, VA
 
     # start color
     keepprops = prop
@@ -157,8 +228,7 @@ def partition(Fin, prop=0):
     V = V.translate(-V.center()).rotate(90, 1).scale(siz)
 
     cut_planes = []
-
-    pf.GUI.signals.WAKEUP.connect(wakeup)
+    scratch = {}
 
     ps.linewidth(2)
     w, h = pf.canvas.width(), pf.canvas.height()
@@ -168,25 +238,26 @@ def partition(Fin, prop=0):
 
     ps.fgcolor(colors.black)
 
-    V, P, N = prepare(V)
+    V, P, N0 = prepare(V)
+    N = N0
     while True:
         res = ps.ask("", ["Adjust Cut", "Keep Cut", "Finish"])
         if res == "Adjust Cut":
-            P, N = testview(F, V, P)
+            P, N = testview(F, V, P, N0)
             print("Plane: point %s, normal %s" % (P, N))
         elif res == "Keep Cut":
             ps.undraw(FA)
             #undraw(VA)
             cut_planes.append((P, N))
             prop += 1
-            F = colorCut(F, -P, N, prop)
+            F = colorCut(F, -P, N, prop, scratch)
             FA = ps.draw(F)
             ps.undraw(VA)
-            V, P, N = prepare(V)
+            V, P, N0 = prepare(V)
+            N = N0
         else:
             break
 
-    pf.GUI.signals.WAKEUP.disconnect(wakeup)
     ps.clear()
     ps.draw(F)
     Fin.setProp(F.prop)
@@ -28,6 +28,8 @@
 """Polygonal facets.
 
 """
+import heapq
+
 import numpy as np
 
 import pyformex as pf
@@ -53,9 +55,12 @@ def projected(X, N):
         N = self.normal
     a, A = rotationAngle([0., 0., 1.], N)
     a, A = a[0], A[0]
-    X = X.rotate(angle=-a, axis=A)
+    # rotate with a single matrix product and translate in place,
+    # to avoid creating intermediate copies of X
+    X = Coords(X)
+    X = X.affine(at.rotationMatrix(-a, A).astype(X.dtype))
     C = X.center()
-    X = X.translate(-C)
+    X -= C
     return X, C, A, a
 
 
@@ -71,6 +76,344 @@ def projected(X, N):
 ##     from voronoi import voronoi
 ##     return TriSurface(X, voronoi(X[:, :2]).triangles)
 
+def _area(x):
+    """Return the signed area of the polygon with vertices x.
+
+    Only the x,y coordinates are used. The area is positive if the
+    polygon is turning anticlockwise.
+    """
+    x, y = x[:, 0], x[:, 1]
+    return 0.5 * ((x[:-1]*y[1:] - x[1:]*y[:-1]).sum() + x[-1]*y[0] - x[0]*y[-1])
+
+
+def _pseudoAngle(cross, dot):
+    """Return a pseudo internal angle from the cross and dot product.
+
+    cross and dot are the cross and dot product of the segment ending at
+    a vertex and the segment leaving from it. The returned value is in the
+    range [0,4[ and increases monotonically with the internal angle at the
+    vertex in the range [0,360[, with a value 2 for an angle of 180 degrees.
+    It is used in the ear clipping instead of the real angle, because it
+    needs no trigonometric functions.
+    """
+    s = abs(cross) + abs(dot)
+    if s == 0.:
+        return 2.
+    r = cross / s
+    if dot >= 0.:
+        return 2. - r
+    elif cross >= 0.:
+        return r
+    else:
+        return 4. + r
+
+
+def _pseudoAngles(x):
+    """Return the pseudo internal angles at all vertices of polygon x.
+
+    This is a vectorized version of :func:`_pseudoAngle` for the polygon
+    with vertices x. Only the x,y coordinates are used.
+    """
+    x = x[:, :2]
+    u = np.empty_like(x)
+    u[0] = x[0] - x[-1]
+    u[1:] = x[1:] - x[:-1]
+    v = np.empty_like(x)
+    v[:-1] = u[1:]
+    v[-1] = u[0]
+    cross = u[:, 0]*v[:, 1] - u[:, 1]*v[:, 0]
+    dot = (u*v).sum(axis=-1)
+    s = abs(cross) + abs(dot)
+    r = cross / np.where(s == 0., 1., s)
+    return np.where(dot >= 0., 2. - r, np.where(cross >= 0., r, 4. + r))
+
+
+def _internalAngle(a, b, c):
+    """Return the pseudo internal angle at vertex b of the path a,b,c.
+
+    Only the x,y coordinates are used. The value is equal to the
+    :func:`_pseudoAngles` value at b.
+    """
+    u0, u1 = b[0] - a[0], b[1] - a[1]
+    v0, v1 = c[0] - b[0], c[1] - b[1]
+    return _pseudoAngle(u0*v1 - u1*v0, u0*v0 + u1*v1)
+
+
+# Number of candidate ears tried first in _earClipKernel
+_ncand = 8
+
+def _earClipKernel(xy):
+    """Ear clipping kernel for Polygon.fill, to be compiled with numba.
+
+    This implements the same algorithm as :meth:`Polygon.earClip`, with
+    explicit loops over the vertices. xy is a float (n,2) array with the
+    vertices of an anticlockwise polygon.
+
+    Returns an int (n-2,3) array with the triangles and the number of
+    triangles that could be created. The latter is less than n-2 if the
+    algorithm got stuck.
+    """
+    n = xy.shape[0]
+    tri = np.full((n-2, 3), -1, dtype=np.int64)
+    nxt = np.empty(n, dtype=np.int64)
+    prv = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        nxt[i] = (i+1) % n
+        prv[i] = (i-1+n) % n
+    alive = np.ones(n, dtype=np.bool_)
+    c = np.empty(n)
+    for j in range(n):
+        c[j] = _kernelAngle(xy, prv[j], j, nxt[j])
+    m = n
+    itri = 0
+    while m > 3:
+        act = np.where(alive)[0]
+        ca = c[act]
+        # Usually one of the smallest angles gives a valid ear: first try
+        # only a few candidates, and sort all of them only if that fails
+        ncand = min(_ncand, m)
+        cand = np.argpartition(ca, ncand-1)[:ncand]
+        srt = act[cand[np.argsort(ca[cand])]]
+        while True:
+            ok = False
+            for j in srt:
+                if c[j] > 2.:
+                    return tri, itri
+                i = prv[j]
+                k = nxt[j]
+                ok = True
+                for p in act:
+                    if p != i and p != j and p != k and c[p] >= 2.:
+                        if _kernelInside(xy, i, j, k, p):
+                            ok = False
+                            break
+                if ok:
+                    break
+            if ok or len(srt) == m:
+                break
+            srt = act[np.argsort(ca)]
+        tri[itri, 0] = i
+        tri[itri, 1] = j
+        tri[itri, 2] = k
+        nxt[i] = k
+        prv[k] = i
+        alive[j] = False
+        c[i] = _kernelAngle(xy, prv[i], i, k)
+        c[k] = _kernelAngle(xy, i, k, nxt[k])
+        m -= 1
+        itri += 1
+    j = np.where(alive)[0][0]
+    tri[itri, 0] = j
+    tri[itri, 1] = nxt[j]
+    tri[itri, 2] = nxt[nxt[j]]
+    return tri, itri+1
+
+
+def _kernelAngle(xy, a, b, c):
+    """Pseudo internal angle at vertex b of the path a,b,c, like _internalAngle"""
+    u0 = xy[b, 0] - xy[a, 0]
+    u1 = xy[b, 1] - xy[a, 1]
+    v0 = xy[c, 0] - xy[b, 0]
+    v1 = xy[c, 1] - xy[b, 1]
+    return _pseudoAngle(u0*v1 - u1*v0, u0*v0 + u1*v1)
+
+
+def _kernelInside(xy, i, j, k, p):
+    """Check whether point p is inside (or on) the triangle i,j,k"""
+    d1 = ((xy[j, 0]-xy[i, 0]) * (xy[p, 1]-xy[i, 1]) -
+          (xy[j, 1]-xy[i, 1]) * (xy[p, 0]-xy[i, 0]))
+    d2 = ((xy[k, 0]-xy[j, 0]) * (xy[p, 1]-xy[j, 1]) -
+          (xy[k, 1]-xy[j, 1]) * (xy[p, 0]-xy[j, 0]))
+    d3 = ((xy[i, 0]-xy[k, 0]) * (xy[p, 1]-xy[k, 1]) -
+          (xy[i, 1]-xy[k, 1]) * (xy[p, 0]-xy[k, 0]))
+    return ((d1 >= 0. and d2 >= 0. and d3 >= 0.) or
+            (d1 <= 0. and d2 <= 0. and d3 <= 0.))
+
+
+def _earClipBatchKernel(xy, starts):
+    """Ear clipping kernel for many polygons, to be compiled with numba.
+
+    xy is a float (nvertex,2) array with the vertices of all polygons,
+    where polygon i has the vertices starts[i]:starts[i+1]. All polygons
+    should be turning anticlockwise.
+
+    Returns an int array with the triangles of all polygons, using the
+    vertex numbers local to each polygon, and an int array with the number
+    of triangles created for each polygon. For polygon i, space is reserved
+    for nvertex_i-2 triangles, but only the number created are valid.
+    """
+    npoly = starts.shape[0] - 1
+    tri = np.full((starts[-1] - 2*npoly, 3), -1, dtype=np.int64)
+    ntri = np.empty(npoly, dtype=np.int64)
+    pos = 0
+    for p in range(npoly):
+        t, nt = _earClipKernel(xy[starts[p]:starts[p+1]])
+        tri[pos:pos+nt] = t[:nt]
+        ntri[p] = nt
+        pos += starts[p+1] - starts[p] - 2
+    return tri, ntri
+
+
+# The numba compiled kernels, compiled on first use
+_jit = None
+
+def _jitKernels():
+    """Return the ear clipping kernels compiled with numba.
+
+    The kernels and the helper functions they call are compiled from
+    copies of the functions, which look up each other in a separate
+    namespace. The module functions themselves remain pure Python, so
+    that :meth:`Polygon.earClip` never runs through numba.
+
+    Returns a dict with the compiled functions, keyed by their names.
+    """
+    global _jit
+    if _jit is None:
+        import types
+        import numba
+        jit = dict(globals())
+        for f in (_pseudoAngle, _kernelAngle, _kernelInside,
+                  _earClipKernel, _earClipBatchKernel):
+            f = types.FunctionType(f.__code__, jit, f.__name__, f.__defaults__)
+            jit[f.__name__] = numba.njit(cache=True)(f)
+        _jit = jit
+    return _jit
+
+
+def _numbaEarClip(x):
+    """Fill the polygon with vertices x using the numba compiled kernel.
+
+    The polygon may be turning clockwise or anticlockwise.
+    Returns an int array with the triangles.
+    """
+    return _numbaEarClipMany([x])[0]
+
+
+def _numbaEarClipMany(xs):
+    """Fill many polygons in a single call of the numba compiled kernel.
+
+    xs is a list of the vertex arrays of the polygons. The polygons may be
+    turning clockwise or anticlockwise.
+    Returns a list with the int array of triangles for each polygon.
+    """
+    jit = _jitKernels()
+    xys, cws = [], []
+    for x in xs:
+        xy = np.asarray(x[:, :2], dtype=np.float64)
+        # The kernel needs anticlockwise polygons
+        cw = _area(xy) < 0.
+        xys.append(xy[::-1] if cw else xy)
+        cws.append(cw)
+    starts = np.cumsum([0] + [len(xy) for xy in xys])
+    tri, ntri = jit['_earClipBatchKernel'](np.concatenate(xys), starts)
+    res = []
+    pos = 0
+    for xy, cw, nt in zip(xys, cws, ntri):
+        n = len(xy)
+        t = tri[pos:pos+nt]
+        pos += n - 2
+        if nt < n - 2:
+            print("OOPS, I GOT STUCK!\nMaybe the curve is self-intersecting?")
+        if cw:
+            t = (n - 1 - t)[:, ::-1]
+        res.append(t)
+    return res
+
+
+def _insideTriangle(t, p):
+    """Check which points p are inside (or on the border of) triangle t.
+
+    t is a float (3,2) array with the vertices of the triangle and p is
+    a float (npts,2) array with the points. This is a 2D version of
+    :func:`geomtools.insideTriangle`, using the signs of cross products.
+    Returns a bool (npts,) array.
+    """
+    d = np.empty((3, p.shape[0]))
+    for a in range(3):
+        b = (a+1) % 3
+        d[a] = ((t[b, 0]-t[a, 0]) * (p[:, 1]-t[a, 1]) -
+                (t[b, 1]-t[a, 1]) * (p[:, 0]-t[a, 0]))
+    return (d >= 0.).all(axis=0) | (d <= 0.).all(axis=0)
+
+
+def _libEarClip(xy):
+    """Fill the polygon with vertices xy using the compiled library.
+
+    The polygon may be turning clockwise or anticlockwise.
+    Returns an int array with the triangles.
+    """
+    from pyformex.lib import misc
+    n = xy.shape[0]
+    # The library function needs an anticlockwise polygon
+    cw = _area(xy) < 0.
+    tri, ntri = misc.earclip(xy[::-1] if cw else xy)
+    if ntri < n - 2:
+        print("OOPS, I GOT STUCK!\nMaybe the curve is self-intersecting?")
+    tri = tri[:ntri]
+    if cw:
+        tri = (n - 1 - tri)[:, ::-1]
+    return tri
+
+
+def _pyEarClip(x):
+    """Fill the polygon with vertices x using :meth:`Polygon.earClip`.
+
+    The polygon may be turning clockwise or anticlockwise.
+    Returns an int array with the triangles.
+
+    Examples
+    --------
+    A concave polygon turning clockwise:
+
+    >>> x = Coords([[0.,2.], [1.,1.], [2.,2.], [2.,0.], [0.,0.]])
+    >>> tri = _pyEarClip(x)
+    >>> len(tri)
+    3
+    >>> float(TriSurface(x, _orient(x, tri)).areas().sum())
+    3.0
+    """
+    n = x.shape[0]
+    # earClip needs an anticlockwise polygon
+    cw = _area(x) < 0.
+    tri = np.asarray(Polygon(x[::-1] if cw else x).earClip().elems)
+    if cw:
+        tri = (n - 1 - tri)[:, ::-1]
+    return tri
+
+
+_tri_pool = {}
+
+def _triBuffer(n):
+    """Return a scratch int array (n-2,3) for the triangles of an n-gon.
+
+    The arrays are kept in a pool and returned again by later calls with
+    the same n. This is safe because the TriSurface created from them
+    gets its own copy of the elems (Connectivity always converts them).
+    """
+    tri = _tri_pool.get(n)
+    if tri is None:
+        tri = _tri_pool[n] = np.empty((n-2, 3), dtype=at.Int)
+    return tri
+
+
+def _orient(x, tri):
+    """Orient the triangles tri on x like the polygon x.
+
+    Triangles that have an orientation opposite to the polygon with
+    vertices x are reversed. Returns an int array with the triangles.
+    """
+    x = np.asarray(x)[:, :2]
+    tri = np.array(tri, dtype=at.Int)
+    A = _area(x)
+    # twice the signed area of the triangles
+    t = x[tri]
+    s = ((t[:, 1, 0]-t[:, 0, 0]) * (t[:, 2, 1]-t[:, 0, 1]) -
+         (t[:, 1, 1]-t[:, 0, 1]) * (t[:, 2, 0]-t[:, 0, 0]))
+    flip = s * A < 0.
+    tri[flip] = tri[flip, ::-1]
+    return tri
+
+
 # TODO: Use PolyLine to represent coords?
 # TODO: Subclass from PolyLine? : and block opening the curve
 
@@ -80,13 +423,26 @@ class Polygon(Geometry):
     The border is specified as a Coords object with shape (nvertex,3)
     specifying the vertex coordinates in order.
     While the Coords are 3d, only the first 2 components are used.
+
+    Parameters
+    ----------
+    border: :term:`coords_like` (nvertex,3)
+        The vertices of the polygon, in order along the border.
+        They are stored as a C-contiguous :class:`Coords`, so that the
+        computations do not need to make contiguous copies. No copy is
+        made if border already is such a Coords.
+    normal: int or float :term:`array_like` (3,)
+        The normal on the plane of the polygon. This is currently not used:
+        the polygon is always taken to be in the x,y plane.
+    holes: list
+        The holes in the polygon. This is currently not used.
     """
 
     def __init__(self, border, normal=2, holes=[]):
         """Initialize a Polygon instance"""
         Geometry.__init__(self)
         self.prop = None
-        self.coords = border.reshape(-1, 3)
+        self.coords = Coords(np.ascontiguousarray(border)).reshape(-1, 3)
 
     # implement abstractmethods
     def nelems(self):
@@ -95,6 +451,19 @@ class Polygon(Geometry):
         return self
 
 
+    @property
+    def _xy(self):
+        """The x,y coordinates of the vertices as a contiguous (n,2) array.
+
+        All the polygon computations only use this array. It is computed
+        on first use and kept until the coords are replaced.
+        """
+        if getattr(self, '_xy_coords', None) is not self.coords:
+            self._xy_data = np.ascontiguousarray(self.coords[:, :2])
+            self._xy_coords = self.coords
+        return self._xy_data
+
+
     def npoints(self):
         """Return the number of points and edges."""
         return self.coords.shape[0]
@@ -103,13 +472,29 @@ class Polygon(Geometry):
     def vectors(self):
         """Return the vectors from each point to the next one."""
         x = self.coords
-        return np.roll(x, -1, axis=0) - x
+        v = np.empty_like(x)
+        v[:-1] = x[1:] - x[:-1]
+        v[-1] = x[0] - x[-1]
+        return v
+
+
+    def _xyVectors(self):
+        """Return the x,y components of the vectors as a float (n,2) array.
+
+        This is the 2D version of :meth:`vectors`, computed from
+        :attr:`_xy`, used by the polygon computations.
+        """
+        x = self._xy
+        v = np.empty_like(x)
+        v[:-1] = x[1:] - x[:-1]
+        v[-1] = x[0] - x[-1]
+        return v
 
 
     def angles(self):
         """Return the angles of the line segments with the x-axis."""
-        v = self.vectors()
-        return at.arctand2(v[:, 1], v[:, 0])
+        v = self._xyVectors()
+        return np.arctan2(v[:, 1], v[:, 0]) * (180. / np.pi)
 
 
     def externalAngles(self):
@@ -122,10 +507,11 @@ class Polygon(Geometry):
         A convex polygon has all angles of the same sign.
         """
         a = self.angles()
-        va =  a - np.roll(a, 1)
-        va[va <= -180.] += 360.
-        va[va > 180.] -= 360.
-        return va
+        va = np.empty_like(a)
+        va[0] = a[0] - a[-1]
+        va[1:] = a[1:] - a[:-1]
+        # bring into the range ]-180,180]
+        return 180. - (180. - va) % 360.
 
 
     def isConvex(self):
@@ -137,7 +523,18 @@ class Polygon(Geometry):
         - -1 if the Polygon is convex, but turning clockwise,
         - 0 if the Polygon is not convex.
         """
-        return int(sign(self.externalAngles()).sum()) / self.npoints()
+        # The sign of the external angles is that of the cross product
+        # of the segments ending at and leaving from the vertex.
+        v = self._xyVectors()
+        cross = np.empty(v.shape[0])
+        cross[0] = v[-1, 0] * v[0, 1] - v[-1, 1] * v[0, 0]
+        cross[1:] = v[:-1, 0] * v[1:, 1] - v[:-1, 1] * v[1:, 0]
+        if cross[0] > 0. and (cross > 0.).all():
+            return 1
+        elif cross[0] < 0. and (cross < 0.).all():
+            return -1
+        else:
+            return 0
 
 
     def internalAngles(self):
@@ -160,86 +557,211 @@ class Polygon(Geometry):
         """Fill the surface inside the polygon with triangles.
 
         Returns a TriSurface filling the surface inside the polygon.
+
+        Convex polygons are filled with a fan of triangles from the first
+        vertex. Other ones are triangulated with the mapbox_earcut module,
+        if that is available.
+        Else, the ear clipping algorithm of :meth:`earClip` is used,
+        compiled with numba if that is available, or else from the
+        pyFormex compiled library if that is loaded, or else in pure Python.
+        The polygon may be turning clockwise or anticlockwise.
+        """
+        x = self.coords
+        xy = self._xy
+        n = x.shape[0]
+        if abs(self.isConvex()) == 1:
+            # any fan is valid and has the orientation of the polygon
+            tri = _triBuffer(n)
+            tri[:, 0] = 0
+            tri[:, 1] = np.arange(1, n-1)
+            tri[:, 2] = np.arange(2, n)
+            return TriSurface(x, tri)
+        elif utils.Module.has('earcut'):
+            import mapbox_earcut
+            tri = mapbox_earcut.triangulate_float64(
+                np.asarray(xy, dtype=np.float64),
+                np.array([n], dtype=np.uint32)).reshape(-1, 3)
+        elif utils.Module.has('numba'):
+            tri = _numbaEarClip(xy)
+        else:
+            from pyformex.lib import misc
+            if misc._accelerated:
+                tri = _libEarClip(xy)
+            else:
+                tri = _pyEarClip(x)
+        return TriSurface(x, _orient(xy, tri))
+
+
+    def earClip(self):
+        """Fill the surface inside the polygon with triangles by ear clipping.
+
+        Returns a TriSurface filling the surface inside the polygon.
+        This is the pure Python implementation used by :meth:`fill`.
+        The polygon should be turning anticlockwise.
         """
         #print("AREA(self) %s" % self.area())
         # creating elems array at once (more efficient than appending)
         #from pyformex.gui.draw import draw, pause, undraw, drawNumbers
-        from pyformex.geomtools import insideTriangle
         x = self.coords
+        xy = self._xy
         n = x.shape[0]
-        tri = -np.ones((n-2, 3), dtype=at.Int)
-        # compute all internal angles
-        e = np.arange(x.shape[0])
-        c = self.internalAngles()
-        # loop in order of smallest angles
+        tri = _triBuffer(n)
+        tri.fill(-1)
+        # compute all (pseudo) internal angles, indexed by the original
+        # vertex number: these sort like the angles and need no atan2
+        c = _pseudoAngles(xy)
+        # the remaining polygon is kept as a doubly linked ring
+        nxt = np.roll(np.arange(n), -1)
+        prv = np.roll(np.arange(n), 1)
+        alive = np.ones(n, dtype=bool)
+        # loop in order of smallest angles, using a heap of candidate ears.
+        # Entries outdated by a change of angle are skipped, using the
+        # version number of the vertex.
+        version = np.zeros(n, dtype=at.Int)
+        heap = [(c[j], j, 0) for j in range(n)]
+        heapq.heapify(heap)
+        # scratch buffers for the ear triangle and the points to check
+        T = np.empty((3, 2), dtype=xy.dtype)
+        P = np.empty((n, 2), dtype=xy.dtype)
         itri = 0
         #draw(x)
         #drawNumbers(x)
         while n > 3:
             #print("ANGLES",c)
-            # try minimal angle
-            srt = c.argsort()
-            for j in srt:
-                #print("ANGLE: %s" % c[j])
-                if c[j] > 180.:
+            # Only reflex (or flat) vertices can be inside an ear
+            reflex = alive & (c >= 2.)
+            tried = []
+            newtri = None
+            while heap:
+                # try minimal angle
+                cj, j, v = heapq.heappop(heap)
+                if not alive[j] or v != version[j]:
+                    continue
+                #print("ANGLE: %s" % cj)
+                if cj > 2.:
                     print("OOPS, I GOT STUCK!\nMaybe the curve is self-intersecting?")
-                    #print("Remaining points: %s" % e)
+                    #print("Remaining points: %s" % np.where(alive)[0])
                     #raise
                     #
                     # We could return here also the remaining part
                     #
                     return TriSurface(x, tri[:itri])
-                i = (j - 1) % n
-                k = (j + 1) % n
-                newtri = [e[i], e[j], e[k]]
-                # remove the point j of triangle i,j,k
-                # recompute adjacent angles of edge i,k
-                ii = (i-1) % n
-                kk = (k+1) % n
-                iq = e[[ii, i, k, kk]]
-                PQ = Polygon(x[iq])
-                cn = PQ.internalAngles()
-                cnew = cn[1:3]
-                reme = np.roll(e, -j)[2:-1]
-                T = x[newtri].reshape(1, 3, 3)
-                P = x[reme].reshape(1, -1, 3)
-                check = insideTriangle(T, P)
+                i = prv[j]
+                k = nxt[j]
+                reme = reflex.copy()
+                reme[[i, j, k]] = False
+                reme = reme.nonzero()[0]
+                nr = len(reme)
+                np.take(xy, [i, j, k], axis=0, out=T)
+                np.take(xy, reme, axis=0, out=P[:nr])
+                check = _insideTriangle(T, P[:nr])
                 if not check.any():
                     # Triangle is ok
+                    newtri = [i, j, k]
                     break
+                tried.append((cj, j, v))
+            if newtri is None:
+                # no valid ear: take the last one tried
+                cj, j, v = tried.pop()
+                newtri = [prv[j], j, nxt[j]]
+            # rejected candidates remain candidates
+            for t in tried:
+                heapq.heappush(heap, t)
+            i, j, k = newtri
             #draw(TriSurface(x,newtri),bbox='last',color='red')
             # accept new triangle
             tri[itri] = newtri
-            c = np.roll(np.concatenate([cnew, np.roll(c, 1-j)[3:]]), j-1)
-            e = np.roll(np.roll(e, -j)[1:], j)
+            # remove the point j of triangle i,j,k
+            nxt[i] = k
+            prv[k] = i
+            alive[j] = False
+            # recompute adjacent angles of edge i,k
+            c[i] = _internalAngle(xy[prv[i]], xy[i], xy[k])
+            c[k] = _internalAngle(xy[i], xy[k], xy[nxt[k]])
+            for m in (i, k):
+                version[m] += 1
+                heapq.heappush(heap, (c[m], m, version[m]))
             n -= 1
             itri += 1
-        tri[itri] = e
+        j = np.where(alive)[0][0]
+        tri[itri] = [j, nxt[j], nxt[nxt[j]]]
         return TriSurface(x, tri)
 
 
     def area(self):
         """Compute area inside a polygon.
 
+        The area is positive if the polygon is turning anticlockwise,
+        negative if it is turning clockwise.
         """
-        from pyformex.plugins.section2d import PlaneSection
-        return PlaneSection(Formex(self.coords)).sectionChar()['A']
+        return _area(self._xy)
 
 
     def toMesh(self):
         from pyformex.mesh import Mesh
-        a = np.arange(self.coords.shape[0])
-        e = np.column_stack([a, np.roll(a, -1)])
+        n = self.coords.shape[0]
+        e = np.empty((n, 2), dtype=at.Int)
+        e[:, 0] = np.arange(n)
+        e[:-1, 1] = e[1:, 0]
+        e[-1, 1] = 0
         return Mesh(self.coords, e)
 
 
     def toFormex(self):
         from pyformex.formex import Formex
-        x = np.stack([self.coords, np.roll(self.coords, -1, axis=0)], axis=1)
+        x = np.empty((self.coords.shape[0], 2, 3), dtype=self.coords.dtype)
+        x[:, 0] = self.coords
+        x[:-1, 1] = self.coords[1:]
+        x[-1, 1] = self.coords[0]
         return Formex(x)
 
 
 
+def fillMany(polys):
+    """Fill many polygons with triangles.
+
+    Parameters
+    ----------
+    polys: list of :class:`Polygon`
+        The polygons to fill.
+
+    Returns
+    -------
+    list of :class:`~trisurface.TriSurface`
+        A list with a TriSurface filling each of the polygons.
+
+    Notes
+    -----
+    If numba is available, all polygons are filled by the compiled ear
+    clipping kernel in a single call. This avoids the Python overhead per
+    polygon when filling a lot of small polygons. Else, this is equivalent
+    with calling :meth:`Polygon.fill` on each of the polygons.
+
+    Examples
+    --------
+    A non-convex polygon and a clockwise square give the same triangles
+    and areas as filling them one by one:
+
+    >>> P = [Polygon([[0.,0.,0.], [2.,0.,0.], [2.,1.,0.], [1.,0.5,0.],
+    ...               [0.,1.,0.]]),
+    ...      Polygon([[0.,1.,0.], [1.,1.,0.], [1.,0.,0.], [0.,0.,0.]])]
+    >>> S = fillMany(P)
+    >>> [s.nelems() for s in S]
+    [3, 2]
+    >>> [s.nelems() for s in S] == [p.fill().nelems() for p in P]
+    True
+    >>> [float(s.areas().sum()) for s in S]
+    [1.5, 1.0]
+    >>> np.allclose([s.areas().sum() for s in S],
+    ...             [p.fill().areas().sum() for p in P])
+    True
+    """
+    if not utils.Module.has('numba'):
+        return [p.fill() for p in polys]
+    tris = _numbaEarClipMany([p._xy for p in polys])
+    return [TriSurface(p.coords, tri) for p, tri in zip(polys, tris)]
+
+
 if __name__ == '__draw__':
 
     def randomPL(n=5, r=0.7, noise=0.0):
@@ -27,6 +27,8 @@
 """Postprocessing Menu
 
 """
+import functools
+
 import numpy as np
 
 import pyformex as pf
@@ -42,6 +44,37 @@ from pyformex.plugins.fe_post import FeResult
 from pyformex.plugins.objects import Objects
 
 
+@functools.lru_cache(maxsize=128)
+def _typeName(typ):
+    """Return the string representation of a type.
+
+    A dict usually contains only a few different types: caching avoids
+    to recreate the same strings for every item.
+    """
+    return str(typ)
+
+
+@functools.lru_cache(maxsize=128)
+def _classDir(cls):
+    """Return the names of the attributes of a class, as a tuple."""
+    return tuple(dir(cls))
+
+
+def _dir(obj):
+    """Return the same list of names as dir(obj).
+
+    For objects with the default __dir__, the names of the class
+    attributes are cached per class, so that the class hierarchy only
+    has to be walked once. Only the instance __dict__ is then added.
+    """
+    cls = type(obj)
+    if cls.__dir__ is not object.__dir__:
+        return dir(obj)
+    keys = set(_classDir(cls))
+    keys.update(getattr(obj, '__dict__', ()))
+    return sorted(keys)
+
+
 class AttributeModel(QtCore.QAbstractTableModel):
     """A model representing the attributes of an object.
 
@@ -49,28 +82,57 @@ class AttributeModel(QtCore.QAbstractTableModel):
     header = ['attribute', 'value', 'is a dict', 'has __dict__', '__class__']
     def __init__(self, name, dic=None, parent=None, *args):
         QtCore.QAbstractItemModel.__init__(self, parent, *args)
+        # Avoid repeated getattr calls when the same cells are repainted
+        self._cell = functools.lru_cache(maxsize=512)(self._cell)
+        self.setSource(name, dic)
+
+    def setSource(self, name, dic=None):
+        """Set the object shown by the model.
+
+        This can be used to show another object in an existing view:
+        the view is notified of the change.
+        """
         if dic is None:
-            dic = gobals()
+            dic = globals()
+        self.beginResetModel()
         self.dic = dic
         self.name = name
         self.obj = dic.get(name, None)
-        keys = dir(self.obj)
-        vals = [str(getattr(self.obj, k)) for k in keys]
-        isdict = [isinstance(self.obj, dict) for k in keys]
-        has_dict = [hasattr(self.obj, '__dict__') for k in keys]
-        has_class = [getattr(self.obj, '__class__') for k in keys]
-        self.items = list(zip(keys, vals, isdict, has_dict, has_class))
+        # Only the attribute names are collected here: the cells are
+        # computed when the view asks for them, which is only for the
+        # visible rows.
+        self.keys = _dir(self.obj)
+        # These columns only depend on the object
+        self._is_dict = isinstance(self.obj, dict)
+        self._has_dict = hasattr(self.obj, '__dict__')
+        self._cls = self.obj.__class__
+        self._cell.cache_clear()
+        self.endResetModel()
 
 
     def rowCount(self, parent):
-        return len(self.items)
+        return len(self.keys)
 
     def columnCount(self, parent):
         return len(self.header)
 
+    def _cell(self, row, col):
+        """Return the value of the cell at (row, col)"""
+        if col == 0:
+            return self.keys[row]
+        elif col == 1:
+            # some attributes listed by dir() may raise AttributeError
+            return str(getattr(self.obj, self.keys[row], None))
+        elif col == 2:
+            return self._is_dict
+        elif col == 3:
+            return self._has_dict
+        else:
+            return self._cls
+
     def data(self, index, role=QtCore.Qt.DisplayRole):
         if index.isValid() and role == QtCore.Qt.DisplayRole:
-            return self.items[index.row()][index.column()]
+            return self._cell(index.row(), index.column())
         return None
 
     def headerData(self, col, orientation=QtCore.Qt.Horizontal, role=QtCore.Qt.DisplayRole):
@@ -87,23 +149,37 @@ class DictModel(QtCore.QAbstractTableModel):
     def __init__(self, dic, name, parent=None, *args):
 
         QtCore.QAbstractItemModel.__init__(self, parent, *args)
+        self.setSource(dic, name)
+
+    def setSource(self, dic, name):
+        """Set the dict shown by the model.
+
+        This can be used to show another dict in an existing view:
+        the view is notified of the change.
+        """
+        self.beginResetModel()
         self.dic = dic
         self.name = name
-        keys = dic.keys()
-        vals = dic.values()
-        typs = [str(type(v)) for v in vals]
-        self.items = list(zip(keys, typs, vals))
-        #print(self.items)
+        # Take a snapshot of the dict; the cells are computed on demand
+        self.keys = list(dic.keys())
+        self.values = list(dic.values())
+        self.endResetModel()
 
     def rowCount(self, parent):
-        return len(self.items)
+        return len(self.keys)
 
     def columnCount(self, parent):
         return len(self.header)
 
     def data(self, index, role=QtCore.Qt.DisplayRole):
         if index.isValid() and role == QtCore.Qt.DisplayRole:
-            return self.items[index.row()][index.column()]
+            row, col = index.row(), index.column()
+            if col == 0:
+                return self.keys[row]
+            elif col == 1:
+                return _typeName(type(self.values[row]))
+            else:
+                return self.values[row]
 
         return None
 
@@ -134,7 +210,8 @@ class Table(QtWidgets.QDialog):
         table.setModel(datamodel)
         table.horizontalHeader().setVisible(True)
         table.verticalHeader().setVisible(False)
-        table.resizeColumnsToContents()
+        self.table = table
+        self.resizeColumnsToSample()
         #print(table.size())
         form.addWidget(table)
 
@@ -144,13 +221,40 @@ class Table(QtWidgets.QDialog):
         #print(table.size())
         #print(form.size())
         #self.resize(table.size())
-        self.table = table
         self.show()
         self.setSizePolicy(QtGui.QSizePolicy.Minimum, QtGui.QSizePolicy.Minimum)
         #form.setSizePolicy(QtGui.QSizePolicy.Minimum,QtGui.QSizePolicy.Minimum)
         table.setSizePolicy(QtGui.QSizePolicy.Minimum, QtGui.QSizePolicy.Minimum)
 
 
+    def resizeColumnsToSample(self, nrows=32):
+        """Resize the columns to fit the contents of the first rows.
+
+        Unlike resizeColumnsToContents, this does not convert all the
+        cells of the model to text, which is slow for large models.
+        The columns remain interactively resizable.
+
+        Parameters
+        ----------
+        nrows: int
+            The number of rows from which the column widths are computed.
+        """
+        table = self.table
+        model = table.model()
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QtWidgets.QHeaderView.Interactive)
+        fm = table.fontMetrics()
+        margin = fm.horizontalAdvance('  ')
+        nrows = min(model.rowCount(QtCore.QModelIndex()), nrows)
+        for col in range(model.columnCount(QtCore.QModelIndex())):
+            width = header.sectionSizeHint(col)
+            for row in range(nrows):
+                data = model.data(model.index(row, col))
+                if data is not None:
+                    width = max(width, fm.horizontalAdvance(str(data)) + margin)
+            table.setColumnWidth(col, width)
+
+
 
 
 if 'tbl' in globals():
@@ -175,27 +279,35 @@ def tblIndex():
     p = m.data(m.index(r, c))
     #print(p,p.toString(),p.toBool())
 
-def showattr(name=None, dic=None):
-    """Show the table of field acronyms."""
+def showTable(clas, caption, *args):
+    """Show a Table with a model of class clas.
+
+    The model is created with the specified args. If the current table
+    is still shown and has a model of the same class, that model is
+    updated with the args instead, and the table is reused.
+    """
     global tbl
+    model = tbl.table.model() if tbl is not None else None
+    if type(model) is clas and tbl.isVisible():
+        model.setSource(*args)
+        tbl.resizeColumnsToSample()
+        tbl.setWindowTitle(caption)
+    else:
+        tbl = Table(clas(*args), caption=caption, actions=[('Cancel',), ('Ok',), ('Print', tblIndex)])
+        tbl.show()
+        tbl.table.updateGeometry()
+        tbl.updateGeometry()
+
+def showattr(name=None, dic=None):
+    """Show the table of attributes of a named object."""
     if dic is None:
         dic = globals()
-    k = dic.keys()
-    sort(k)
-    #print(k)
     if name is None:
         name = 'dia_full'
-    tbl = AttributeTable(name, dic, actions=[('Cancel',), ('Ok',), ('Print', tblIndex)])
-    tbl.show()
+    showTable(AttributeModel, "Attributes of '%s'" % name, name, dic)
 
 def showdict(dic, name=None):
-    global tbl
-    model = DictModel(dic, name)
-    tbl = Table(model, caption="Dict '%s'" % name, actions=[('Cancel',), ('Ok',), ('Print', tblIndex)])
-    tbl.show()
-    tbl.table.resizeColumnsToContents()
-    tbl.table.updateGeometry()
-    tbl.updateGeometry()
+    showTable(DictModel, "Dict '%s'" % name, dic, name)
 
 
 ####################
@@ -206,9 +318,14 @@ def keys(items):
     return [i[0] for i in items]
 
 def named_item(items, name):
-    """Return the named item"""
-    n = keys(items).index(name)
-    return items[n]
+    """Return the named item
+
+    Raises a ValueError if there is no item with the given name.
+    """
+    item = next((i for i in items if i[0] == name), None)
+    if item is None:
+        raise ValueError("%r is not in items" % name)
+    return item
 
 
 def showModel(nodes=True, elems=True):
@@ -218,11 +335,6 @@ def showModel(nodes=True, elems=True):
     transparent(True)
     clear()
     #print(DB.elems)
-    for k in DB.elems:
-        # TODO: WHY HAS THIS LOST THE ELTYPE coming from EeEx calpy????????
-        #print("%s: %s" % (k, len(DB.elems[k])))
-        #print(type(DB.elems[k]))
-        DB.elems[k] = Elems(DB.elems[k], eltype='quad%d'%DB.elems[k].shape[1])
     M = [Mesh(DB.nodes, DB.elems[k], prop=k) for k in DB.elems]
     if nodes:
         draw([m.coords for m in M], nolight=True)
@@ -231,6 +343,23 @@ def showModel(nodes=True, elems=True):
     zoomAll()
 
 
+@functools.lru_cache(maxsize=8)
+def _colorScale(vmin, vmax, vmid):
+    """Return the ColorScale for a range of values.
+
+    Browsing through the steps/increments of a result often shows the
+    same range of values: the ColorScale is then reused.
+    """
+    return ColorScale('RAINBOW', vmin, vmax, vmid, 1., 1.)
+
+
+@functools.lru_cache(maxsize=8)
+def _colorLegend(vmin, vmax, vmid, multiplier):
+    """Return the ColorLegend for a range of values."""
+    return ColorLegend(_colorScale(vmin, vmax, vmid), 100, 20, 20, 30, 200,
+                       scale=multiplier)
+
+
 def showResults(nodes, elems, displ, text, val, showref=False, dscale=100.,
                 count=1, sleeptime=-1., symmetric_scale=False):
     """Display a constant or linear field on triangular elements.
@@ -248,27 +377,38 @@ def showResults(nodes, elems, displ, text, val, showref=False, dscale=100.,
     """
     clear()
 
+    # Coords are single precision: convert once here, so that the
+    # frames below are computed in single precision too
+    nodes = np.ascontiguousarray(nodes, dtype=np.float32)
     if displ is not None:
-    # expand displ if it is smaller than nodes
-        # e.g. in 2d returning only 2d displacements
-        n = nodes.shape[1] - displ.shape[1]
-        if n > 0:
-            displ = growAxis(displ, n, axis=1, fill=0.0)
-
-        if nodes.shape != displ.shape:
+        displ = np.ascontiguousarray(displ, dtype=np.float32)
+        if displ.ndim != 2 or displ.shape[0] != nodes.shape[0] or displ.shape[1] > nodes.shape[1]:
             warning("The displacements do not match the mesh: the mesh coords have shape %s; but the displacements have shape %s. I will continue without displacements." % (nodes.shape, displ.shape))
             displ = None
+        elif displ.shape[1] < nodes.shape[1]:
+            # expand displ if it is smaller than nodes
+            # e.g. in 2d returning only 2d displacements
+            d = np.zeros(nodes.shape, dtype=displ.dtype)
+            d[:, :displ.shape[1]] = displ
+            displ = d
 
     # print(f"Type of elems is {type(elems)}")
     if not isinstance(elems, list):
         elems = [elems]
+    eltypes = ['quad%d' % el.shape[1] for el in elems]
 
     if val is not None:
         print("VAL: %s" % str(val.shape))
 
+    # Create the meshes only once: they are drawn as the reference and
+    # the deformed meshes are derived from these by replacing the coords.
+    # Each frame needs its own meshes though, because the drawn actors
+    # keep a reference to them.
+    meshes = [Mesh(nodes, el, eltype=eltyp) for el, eltyp in zip(elems, eltypes)]
+
     # draw undeformed structure
     if showref:
-        ref = [Mesh(nodes, el, eltype='quad%d'%el.shape[1]) for el in elems]
+        ref = meshes
         draw(ref, bbox=None, color='green', linewidth=1, mode='wireframe', nolight=True)
 
     # compute the colors according to the values
@@ -286,11 +426,10 @@ def showResults(nodes, elems, displ, text, val, showref=False, dscale=100.,
         else:
             vmid = 0.5*(vmin+vmax)
 
-        scalev = [vmin, vmid, vmax]
-        if max(scalev) > 0.0:
-            logv = [abs(a) for a in scalev if a != 0.0]
-            logs = log10(logv)
-            logma = int(logs.max())
+        scalev = np.array([vmin, vmid, vmax])
+        if scalev.max() > 0.0:
+            logv = np.abs(scalev[scalev != 0.0])
+            logma = int(np.log10(logv).max())
         else:
             # All data = 0.0
             logma = 0
@@ -299,9 +438,10 @@ def showResults(nodes, elems, displ, text, val, showref=False, dscale=100.,
             multiplier = 3 * ((2 - logma) // 3)
             #print("MULTIPLIER %s" % multiplier)
 
-        CS = ColorScale('RAINBOW', vmin, vmax, vmid, 1., 1.)
-        cval = np.array([CS.color(v) for v in val])
-        CLA = ColorLegend(CS, 100, 20, 20, 30, 200, scale=multiplier)
+        vmin, vmax, vmid = float(vmin), float(vmax), float(vmid)
+        CS = _colorScale(vmin, vmax, vmid)
+        cval = CS.colors(val).astype(np.float32)
+        CLA = _colorLegend(vmin, vmax, vmid, multiplier)
         drawActor(CLA)
 
     # the supplied text
@@ -320,17 +460,19 @@ def showResults(nodes, elems, displ, text, val, showref=False, dscale=100.,
     # create the frames while displaying them
     dscale = np.array(dscale)
     frames = []   # a place to store the drawn frames
-    bboxes = []
     if sleeptime >= 0:
         delay(sleeptime)
-    for dsc in dscale.flat:
+    if displ is not None:
+        # the deformed nodes of all frames, computed at once
+        all_dnodes = Coords(nodes + dscale.reshape(-1, 1, 1).astype(np.float32) * displ)
+    else:
+        all_dnodes = Coords(nodes)
+    for i, dsc in enumerate(dscale.flat):
 
         if displ is None:
-            dnodes = nodes
+            deformed = meshes
         else:
-            dnodes = nodes + dsc * displ
-        deformed = [Mesh(dnodes, el, eltype='quad%d'%el.shape[1]) for el in elems]
-        bboxes.append(bbox(deformed))
+            deformed = [m._set_coords(all_dnodes[i]) for m in meshes]
         # We store the changing parts of the display, so that we can
         # easily remove/redisplay them
         #print(val)
@@ -352,7 +494,7 @@ def showResults(nodes, elems, displ, text, val, showref=False, dscale=100.,
         frames.append((F, [], T))
         wait()
 
-    zoomBbox(bbox(bboxes))
+    zoomBbox(all_dnodes.bbox())
 
     animateScenes(frames, count, sleeptime)
 
@@ -374,17 +516,25 @@ def animateScenes(scenes, count=1, sleeptime=None):
         count -= 1
 
         for F, A, T in scenes:
+            # items that are the same as in the previous scene are
+            # left on the canvas
             # annotations and decorations should not change smoothly
             # therefore remove the old ones first
-            pf.canvas.removeAnnotation(AA)
-            pf.canvas.removeDecoration(TA)
+            if A is not AA:
+                pf.canvas.removeAnnotation(AA)
+            if T is not TA:
+                pf.canvas.removeDecoration(TA)
             # draw the new items
-            pf.canvas.addActor(F)
-            pf.canvas.addAnnotation(A)
-            pf.canvas.addDecoration(T)
+            if F is not FA:
+                pf.canvas.addActor(F)
+            if A is not AA:
+                pf.canvas.addAnnotation(A)
+            if T is not TA:
+                pf.canvas.addDecoration(T)
             # remove the old actors after drawing the new ones
-            pf.canvas.removeActor(FA)
-            pf.canvas.display()
+            if F is not FA:
+                pf.canvas.removeActor(FA)
+            # update() repaints the canvas, which calls display()
             pf.canvas.update()
             FA, AA, TA = F, A, T
             wait()
@@ -542,11 +692,16 @@ result_types = {
     'COORD2': 'Z-Coordinate',
     'Computed': 'Distance from a point',
 }
+# Lookup lists for the result types, by index and by description
+_result_keys = list(result_types.keys())
+_result_values = list(result_types.values())
+_result_index = {v: i for i, v in enumerate(_result_values)}
 
 
 selection = Objects(clas=FeResult)
 dialog = None
 DB = None
+point = [0., 0., 0.]  # the point for the 'Computed' result
 
 
 def setDB(db):
@@ -554,9 +709,16 @@ def setDB(db):
     global DB
     if isinstance(db, FeResult):
         DB = db
+        # Make the element groups Elems once, when the result is set
+        for k, el in DB.elems.items():
+            # TODO: WHY HAS THIS LOST THE ELTYPE coming from EeEx calpy????????
+            if not isinstance(el, Elems):
+                DB.elems[k] = Elems(el, eltype='quad%d' % el.shape[1])
     else:
         DB = None
     pf.PF['PostProcMenu_result'] = DB
+    _colorScale.cache_clear()
+    _colorLegend.cache_clear()
 
 
 def selectDB(db=None):
@@ -717,8 +879,7 @@ def checkDB():
 
 def shortkey_results(data):
     """Return the dialog data with short keys."""
-    # TODO sanitize the use of list
-    data['resindex'] = list(result_types.values()).index(data['restype'])
+    data['resindex'] = _result_index[data['restype']]
     return data
 
 
@@ -742,7 +903,8 @@ def show_results(data):
     Note that while the data may contain a 'step' and 'inc' value,
     the displayed results are those of the step/inc in the database.
     """
-    globals().update(data)
+    elgroup = data['elgroup']
+    resindex = data['resindex']
     DB.setStepInc(int(data['step']), int(data['inc']))
 
     nodes = DB.nodes
@@ -757,7 +919,7 @@ def show_results(data):
     if displ is not None:
         displ = displ[:, 0:3]
 
-        if autoscale:
+        if data['autoscale']:
             siz0 = Coords(nodes).sizes()
             siz1 = Coords(displ).sizes()
             if siz1.max() == 0.:
@@ -767,29 +929,34 @@ def show_results(data):
                 print(siz0, siz1)
                 w = np.where(siz0 > 0.0)[0]
                 print(w)
-                dscale = 0.5/(siz1[w]/siz0[w]).max()
+                ratio = (siz1[w]/siz0[w]).max()
+                dscale = niceNumber(0.5/ratio)
                 print(dscale)
-                dscale = niceNumber(0.5/(siz1[w]/siz0[w]).max())
 
-    if animate:
-        dscale = dscale * frameScale(nframes, cycle=cycle, shape=shape)
+    if data['animate']:
+        dscale = dscale * frameScale(data['nframes'], cycle=data['cycle'],
+                                     shape=data['shape'])
 
     txt = "Step %S; Inc %I; "
 
     # Get the scalar element result values from the results.
     val = None
     if resindex > 0:
-        key = list(result_types.keys())[resindex]
+        key = _result_keys[resindex]
         if key == 'Computed':
-            if askPoint():
+            point = askPoint()
+            if point is not None:
                 val = Coords(nodes).distanceFromPoint(point)
         else:
             val = DB.getres(key)
-            if key == 'U':
-                val = norm2(val)
+            if val is not None:
+                val = np.asarray(val, dtype=np.float32)
+                if key == 'U':
+                    val = norm2(val)
     if val is not None:
-        txt += list(result_types.values())[resindex]
-    showResults(nodes, elems, displ, txt, val, showref, dscale, count, sleeptime, symmetric_scale)
+        txt += _result_values[resindex]
+    showResults(nodes, elems, displ, txt, val, data['showref'], dscale,
+                data['count'], data['sleeptime'], data['symmetric_scale'])
     return val
 
 
@@ -844,7 +1011,7 @@ def open_dialog():
             _I('step', text='Step', choices=DB.getSteps(), func=set_inc_choices),
             _I('inc', text='Increment', choices=[1]),
             _I('elgroup', text='Element Group', choices=['--ALL--', ]),
-            _I('restype', text='Type of result', choices=list(result_types.values())),
+            _I('restype', text='Type of result', choices=list(_result_values)),
             _I('autoscale', text='Autocalculate deformation scale', value=True),
             _I('dscale', text='Deformation scale', value=100.),
             _I('symmetric_scale', text='Symmetric scale', value=False),
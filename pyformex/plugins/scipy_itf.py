@@ -37,20 +37,31 @@ extended functionalities.
 On Debian/Ubuntu-likes install package 'python3-scipy'.
 """
 
+import numpy as np
+
 from pyformex import utils
 utils.Module.require('scipy')
 
 from pyformex.connectivity import Connectivity
 import pyformex.arraytools as at
+from pyformex import multi
 
 
-def convexHull(points):
+def convexHull(points, qhull_options=None, incremental=False):
     """Return the convex hull of a set of points.
 
     Parameters
     ----------
     points: float array (npoints, 2|3)
         A set of 2D or 3D point coordinates.
+    qhull_options: str, optional
+        Additional options passed to qhull. See the documentation of
+        :class:`scipy.spatial.ConvexHull`. The triangulated output option
+        'Qt' is always used.
+    incremental: bool
+        If True, the :class:`scipy.spatial.ConvexHull` instance is returned
+        as well. It allows adding points with its add_points method,
+        rather than computing the hull of the extended set from scratch.
 
     Returns
     -------
@@ -61,6 +72,9 @@ def convexHull(points):
         For a 3D convex hull, the Connectivity will have plexitude 3 and an
         eltype 'tri3', while for 2D convex hulls, the Connectivity has
         plexitude 2 and eltype 'line2'.
+    hull: :class:`scipy.spatial.ConvexHull`
+        Only returned if incremental is True. The qhull object from which
+        the Connectivity was obtained, or None if qhull raised an error.
 
     Notes
     -----
@@ -79,11 +93,201 @@ def convexHull(points):
     if ndim not in [2, 3]:
         raise ValueError('Expected 2D or 3D coordinate array')
 
+    qhull = None
     try:
-        hull = ConvexHull(points).simplices
+        if incremental:
+            # the hull should hold all the points to allow adding points
+            qhull = ConvexHull(points, incremental=True,
+                               qhull_options=qhull_options)
+            hull = qhull.simplices
+        elif len(points) >= _prefilter_min:
+            keep = _hullCandidates(points)
+            hull = keep[ConvexHull(points[keep],
+                                   qhull_options=qhull_options).simplices]
+        else:
+            hull = ConvexHull(points, qhull_options=qhull_options).simplices
     except Exception:
         hull = []
 
-    return Connectivity(hull, nplex=ndim, eltype='tri3' if ndim==3 else 'line2')
+    hull = Connectivity(hull, nplex=ndim, eltype='tri3' if ndim==3 else 'line2')
+    if incremental:
+        return hull, qhull
+    return hull
+
+
+# Minimum number of points to prefilter before computing the hull
+_prefilter_min = 10000
+
+
+def _hullCandidates(points, chunk=65536):
+    """Find the points that can be on the convex hull of a point set.
+
+    The convex hull of the extreme points in the directions of the axes
+    and the diagonals is computed first. The points strictly inside
+    that hull can not be on the hull of the full set. For large point
+    clouds this removes most points at the cost of a few dot products.
+
+    Returns an int array with the indices of the remaining points.
+    """
+    from itertools import product
+    from scipy.spatial import ConvexHull
+
+    ndim = points.shape[1]
+    # half of the directions: the other half are their opposites
+    dirs = [d for d in product([-1., 0., 1.], repeat=ndim) if any(d)]
+    dirs = np.array(dirs[len(dirs)//2:], dtype=points.dtype)
+    proj = np.dot(dirs, points.T)
+    extremes = np.unique(np.concatenate([proj.argmax(axis=1),
+                                         proj.argmin(axis=1)]))
+    del proj
+    try:
+        eq = ConvexHull(points[extremes]).equations
+    except Exception:
+        # the extreme points do not span the full space
+        return np.arange(len(points))
+    normals = eq[:, :ndim].astype(points.dtype)
+    # a safety margin relative to the size of the point set
+    offsets = eq[:, ndim:] + 1.e-6 * abs(points).max()
+    keep = np.empty(len(points), dtype=bool)
+    for i in range(0, len(points), chunk):
+        d = np.dot(normals, points[i:i+chunk].T)
+        d += offsets
+        keep[i:i+chunk] = (d > 0.).any(axis=0)
+    return np.where(keep)[0]
+
+
+def convexHulls(point_sets, nproc=-1):
+    """Return the convex hulls of many sets of points.
+
+    Parameters
+    ----------
+    point_sets: list of float arrays (npoints, 2|3)
+        A list of sets of 2D or 3D point coordinates.
+    nproc: int
+        The number of processes to use. If negative (default), it is set
+        to the number of processors on the host, but not more than the
+        number of point sets. If 1, the hulls are computed in the current
+        process.
+
+    Returns
+    -------
+    list of :class:`Connectivity`
+        The convex hull of each of the point sets, as returned by
+        :func:`convexHull`.
+
+    Notes
+    -----
+    The point sets are divided in blocks of subsequent sets, and each
+    block is handled by a separate process, using :func:`multi.multitask`.
+    With processes, the Python overhead of setting up each hull is done
+    in parallel too. This pays off when there are many point sets.
+
+    Examples
+    --------
+    >>> P = [[0.,0.],[1.,0.],[1.,1.],[0.,1.],[0.5,0.5]]
+    >>> for hull in convexHulls([P, P[:3]], nproc=1):
+    ...     print(len(hull))
+    4
+    3
+    """
+    if nproc < 0:
+        nproc = min(len(point_sets), multi.cpu_count())
+    if nproc <= 1:
+        return [convexHull(points) for points in point_sets]
+    bounds = np.linspace(0, len(point_sets), nproc+1).round().astype(int)
+    tasks = [(convexHulls, (point_sets[i:j], 1))
+             for i, j in zip(bounds[:-1], bounds[1:])]
+    res = multi.multitask(tasks, nproc)
+    return [hull for hulls in res for hull in hulls]
+
+
+def _containsKernel(eq, q, tol, out):
+    """Test which points q are inside all the planes eq.
+
+    This kernel is compiled with numba. It stops testing a point
+    as soon as it is found outside one of the planes.
+    """
+    nf, ndim = eq.shape[0], q.shape[1]
+    for i in range(q.shape[0]):
+        inside = True
+        for f in range(nf):
+            d = eq[f, ndim]
+            for j in range(ndim):
+                d += eq[f, j] * q[i, j]
+            if d > tol:
+                inside = False
+                break
+        out[i] = inside
+    return out
+
+
+_jitted = False
+
+def _jitKernels():
+    """Compile the containment kernel with numba, if not done yet."""
+    global _jitted, _containsKernel
+    if not _jitted:
+        import numba
+        _containsKernel = numba.njit(cache=True)(_containsKernel)
+        _jitted = True
+
+
+def hullContains(points, queries, tol=1.e-8, chunk=100000):
+    """Test which points are inside the convex hull of a point set.
+
+    Parameters
+    ----------
+    points: float array (npoints, 2|3)
+        A set of 2D or 3D point coordinates defining the convex hull.
+    queries: float array (nqueries, 2|3)
+        The points to test, with the same dimension as points.
+    tol: float
+        Tolerance on the distance to the hull planes. Points at a
+        distance smaller than tol outside the hull are considered inside.
+    chunk: int
+        Without numba, the queries are tested in chunks of this size,
+        to limit the memory used.
+
+    Returns
+    -------
+    bool array (nqueries,)
+        True for the queries that are inside the convex hull.
+
+    Notes
+    -----
+    The hull is computed only once, and the queries are tested against
+    the plane equations of its facets. If numba is available, the test
+    is done by a compiled kernel that stops at the first facet a query
+    is outside of. Else, the queries are tested against all facets
+    with numpy.
+
+    An error is raised by :func:`scipy.spatial.ConvexHull` if the points
+    do not span the full space, e.g. if all the points of a 3D set are
+    in a plane.
+
+    Examples
+    --------
+    >>> P = [[0.,0.],[1.,0.],[1.,1.],[0.,1.]]
+    >>> hullContains(P, [[0.5,0.5],[1.,0.5],[1.5,0.5]])
+    array([ True,  True, False])
+    """
+    utils.Module.require('scipy', '>=0.12.0')
+    from scipy.spatial import ConvexHull
+
+    points = at.checkArray(points, ndim=2, kind='f')
+    ndim = points.shape[1]
+    queries = at.checkArray(queries, shape=(-1, ndim), kind='f', allow='i')
+    # plane equations of the facets, with outward normals
+    eq = ConvexHull(points).equations
+    queries = np.ascontiguousarray(queries, dtype=eq.dtype)
+    out = np.empty(len(queries), dtype=bool)
+    if utils.Module.has('numba'):
+        _jitKernels()
+        return _containsKernel(eq, queries, tol, out)
+    for i in range(0, len(queries), chunk):
+        d = np.dot(queries[i:i+chunk], eq[:, :ndim].T)
+        d += eq[:, ndim]
+        out[i:i+chunk] = (d <= tol).all(axis=1)
+    return out
 
 # End
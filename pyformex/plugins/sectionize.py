@@ -29,6 +29,7 @@
 Create, measure and approximate cross section of a Formex.
 """
 import pyformex as pf
+from pyformex import utils
 from pyformex.curve import PolyLine
 from pyformex import simple
 from pyformex.gui.draw import *
@@ -52,9 +53,10 @@ def centerline(F, dir, nx=2, mode=2, th=0.2):
     """Compute the centerline in the direction dir.
 
     """
+    # The center is the center of the bbox: no need to compute that twice
     bb = F.bbox()
-    x0 = F.center()
-    x1 = F.center()
+    x0 = bb.center()
+    x1 = x0.copy()
     x0[dir] = bb[0][dir]
     x1[dir] = bb[1][dir]
     n = np.array((0, 0, 0))
@@ -63,19 +65,18 @@ def centerline(F, dir, nx=2, mode=2, th=0.2):
     grid = simple.regularGrid(x0, x1, n, swapaxes=True).reshape((-1, 3))
 
     th *= (x1[dir]-x0[dir])/nx
-    n = np.zeros((3,))
-    n[dir] = 1.0
-
-    def localCenter(X, P, n):
-        """Return the local center of points X in the plane P,n"""
-        test = abs(X.distanceFromPlane(P, n)) < th  # points close to plane
-        if mode == 1:
-            C = X[test].center()
-        elif mode == 2:
-            C = X[test].centroid()
-        return C
-
-    center = [localCenter(F, P, n) for P in grid]
+
+    # Sort the points along dir: the points close to a grid plane
+    # then form a contiguous slice of the sorted points
+    X = F.coords.reshape(-1, 3)
+    X = X[X[:, dir].argsort(kind='stable')]
+    x = X[:, dir]
+    lo = x.searchsorted(grid[:, dir] - th, side='right')
+    hi = x.searchsorted(grid[:, dir] + th, side='left')
+    if mode == 1:
+        center = [X[i:j].center() for i, j in zip(lo, hi)]
+    elif mode == 2:
+        center = [X[i:j].centroid() for i, j in zip(lo, hi)]
     return PolyLine(center)
 
 
@@ -93,7 +94,7 @@ def createSegments(F, ns=None, th=None):
     if at.isInt(ns) and isinstance(th, float):
         xmin, ymin, zmin = bb[0]
         xmax, ymax, zmax = bb[1]
-        xgem, ygem, zgem = F.center()
+        xgem, ygem, zgem = bb.center()
         A = [xmin, ygem, zgem]
         B = [xmax, ygem, zgem]
         segments = Formex([[A, B]]).subdivide(ns)
@@ -102,6 +103,44 @@ def createSegments(F, ns=None, th=None):
     return 0, 0, []
 
 
+# replaced with numba.prange when the kernel is compiled
+_prange = range
+
+def _sectionKernel(coords, ctrs, normals, thl, out):
+    """Find the elements close to each of the section planes.
+
+    This kernel is compiled with numba, running the elements in
+    parallel. Testing an element against a plane stops at the first
+    point that is too far from the plane.
+    """
+    nelems, nplex = coords.shape[0], coords.shape[1]
+    nsec = ctrs.shape[0]
+    for e in _prange(nelems):
+        for m in range(nsec):
+            close = True
+            for p in range(nplex):
+                d = 0.
+                for j in range(3):
+                    d += (coords[e, p, j] - ctrs[m, j]) * normals[m, j]
+                if abs(d) >= thl[m]:
+                    close = False
+                    break
+            out[e, m] = close
+    return out
+
+
+_jitted = False
+
+def _jitKernels():
+    """Compile the section kernel with numba, if not done yet."""
+    global _jitted, _prange, _sectionKernel
+    if not _jitted:
+        import numba
+        _prange = numba.prange
+        _sectionKernel = numba.njit(cache=True, parallel=True)(_sectionKernel)
+        _jitted = True
+
+
 def sectionize(F, segments, th=0.1, visual=True):
     """Sectionize a Formex in planes perpendicular to the segments.
 
@@ -125,21 +164,35 @@ def sectionize(F, segments, th=0.1, visual=True):
         linewidth(1)
         draw(F, color='yellow')
         linewidth(2)
-    for s in segments:
-        c = 0.5 * (s[0]+s[1])
-        d = s[1]-s[0]
-        l = at.length(d)
-        n = d/l
-        t = th*l
-        test = abs(F.distanceFromPlane(c, n)) < th*l
-        test = test.sum(axis=-1)
-        G = F.select(test==3)
+    # Find the elements near the planes of all segments at once
+    S = Formex(segments).coords.reshape(-1, 2, 3)
+    ctrs = 0.5 * (S[:, 0] + S[:, 1])
+    d = S[:, 1] - S[:, 0]
+    l = np.linalg.norm(d, axis=1, keepdims=True)
+    normals = d / l
+    thl = th * l[:, 0]
+    # elements having all their points close to the plane
+    test = np.empty((F.nelems(), len(ctrs)), dtype=bool)
+    if utils.Module.has('numba'):
+        _jitKernels()
+        _sectionKernel(np.ascontiguousarray(F.coords), ctrs, normals, thl, test)
+    else:
+        # process the planes in chunks to limit the size of dist
+        offset = (ctrs*normals).sum(axis=-1)
+        for i in range(0, len(ctrs), 16):
+            j = slice(i, i+16)
+            dist = np.dot(F.coords, normals[j].T) - offset[j]
+            test[:, j] = (abs(dist) < thl[j]).all(axis=1)
+    for n, t in zip(normals, test.T):
+        G = F.select(t)
         if visual:
             draw(G, color='blue', view=None)
             pf.canvas.update()
         print(G)
         C = G.center()
-        D = 2 * G.distanceFromLine(C, n).mean()
+        # n is a unit vector: the distance from the line is |(X-C) x n|
+        c = np.cross(G.coords.reshape(-1, 3) - C, n)
+        D = 2 * np.sqrt(np.einsum('ij,ij->i', c, c)).mean()
         print("Section Center: %s; Diameter: %s" % (C, D))
         sections.append(G)
         ctr.append(C)
@@ -95,15 +95,10 @@ def readSmeshFile(fn):
             nodeInfo = readNodeFile(fn.with_suffix('.node'))
 
         # facet section
+        offset = nodeOffset(nodeInfo[1])
         line = skipComments(fil)
         nelems, nbmark = getInts(line, 2)
-        facetInfo = readSmeshFacetsBlock(fil, nelems, nbmark)
-
-        nodenrs = nodeInfo[1]
-        if nodenrs.min() == 1 and nodenrs.max()==nodenrs.size:
-            elems = facetInfo[0]
-            for e in elems:
-                elems[e] -= 1
+        facetInfo = readSmeshFacetsBlock(fil, nelems, nbmark, offset)
 
         # We currently do not read the holes and attributes
 
@@ -203,6 +198,85 @@ def getInts(line, nint):
     return s
 
 
+def readDataBlock(fil, nrows, ncols, dtype):
+    """Read a block of numerical data from a tetgen file.
+
+    Reads the next nrows data lines from fil, each containing ncols blank
+    separated numbers. Blank lines and comment lines are skipped, and
+    comments at the end of a line are ignored. The lines are parsed
+    all at once by the C parser of :func:`numpy.loadtxt`, which is a lot
+    faster than :func:`numpy.fromfile` with a separator. The file is left
+    positioned at the line following the block.
+
+    Returns an array with shape (nrows, ncols) and the specified dtype.
+    Raises a ValueError if the file ends before nrows data lines were read.
+
+    Examples
+    --------
+    >>> from io import StringIO
+    >>> fil = StringIO("# nodes\\n1 0.0 0.0 0.0\\n\\n2 1.0 0.5 0.0 # two\\n"
+    ...                "3 0.0 1.0 0.0\\nnext\\n")
+    >>> readDataBlock(fil, 3, 4, np.float32)
+    array([[1. , 0. , 0. , 0. ],
+           [2. , 1. , 0.5, 0. ],
+           [3. , 0. , 1. , 0. ]], dtype=float32)
+    >>> fil.readline()
+    'next\\n'
+    >>> readDataBlock(StringIO("1 4 5 6\\n2 5 6 7\\n"), 2, 4, np.int32)
+    array([[1, 4, 5, 6],
+           [2, 5, 6, 7]], dtype=int32)
+    >>> readDataBlock(StringIO("1 4 5 6\\n"), 2, 4, np.int32)
+    Traceback (most recent call last):
+    ...
+    ValueError: Unexpected end of file: expected 2 data lines, got 1
+    """
+    if nrows == 0:
+        return np.empty((0, ncols), dtype=dtype)
+    lines = []
+    while len(lines) < nrows:
+        new = [fil.readline() for i in range(nrows - len(lines))]
+        # only keep lines that are not blank or a comment
+        lines.extend(line for line in new if line.lstrip()[:1] not in ('', '#'))
+        if not new[-1]:
+            raise ValueError("Unexpected end of file: expected %s data lines,"
+                             " got %s" % (nrows, len(lines)))
+    return np.loadtxt(lines, dtype=dtype, ndmin=2).reshape(nrows, ncols)
+
+
+def nodeOffset(nodenrs):
+    """Return the number of the first node in a tetgen node numbering.
+
+    Tetgen numbers the nodes either from 0 or from 1. Returns 1 if the
+    node numbers run from 1 to the number of nodes, else 0.
+    As tetgen writes the nodes in sequential order, the first and last
+    number normally suffice, and the full array is only scanned if they
+    do not match.
+
+    Examples
+    --------
+    >>> nodeOffset(np.arange(4))
+    0
+    >>> nodeOffset(np.arange(1, 5))
+    1
+    >>> nodeOffset(np.array([3, 1, 4, 2]))
+    1
+
+    A numbering that does not run from 1 to the number of nodes is
+    treated as 0-based:
+
+    >>> nodeOffset(np.array([1, 2, 5]))
+    0
+    >>> nodeOffset(np.array([], dtype=int))
+    0
+    """
+    n = nodenrs.size
+    if n == 0:
+        return 0
+    if nodenrs[0] == 1 and nodenrs[-1] == n:
+        return 1
+    return int(nodenrs.min() == 1 and nodenrs.max() == n)
+
+
 def addElem(elems, nrs, e, n, nplex):
     """Add an element to a collection."""
     if nplex not in elems:
@@ -225,7 +299,7 @@ def readNodesBlock(fil, npts, ndim, nattr, nbmark):
     The last two may be None.
     """
     ndata = 1 + ndim + nattr + nbmark
-    data = np.fromfile(fil, sep=' ', dtype=at.Float, count=npts*(ndata)).reshape(npts, ndata)
+    data = readDataBlock(fil, npts, ndata, at.Float)
     nrs = data[:, 0].astype(np.int32)
     coords = Coords(data[:, 1:ndim+1])
     if nattr > 0:
@@ -251,7 +325,7 @@ def readElemsBlock(fil, nelems, nplex, nattr):
     The last can be None.
     """
     ndata = 1 + nplex + nattr
-    data = np.fromfile(fil, sep=' ', dtype=np.int32, count=ndata*nelems).reshape(nelems, ndata)
+    data = readDataBlock(fil, nelems, ndata, np.int32)
     nrs = data[:, 0]
     elems = data[:, 1:1+nplex]
     if nattr > 0:
@@ -280,7 +354,7 @@ def readFacesBlock(fil, nelems, nbmark):
     The last can be None.
     """
     ndata = 1 + 3 + nbmark
-    data = np.fromfile(fil, sep=' ', dtype=np.int32, count=ndata*nelems).reshape(nelems, ndata)
+    data = readDataBlock(fil, nelems, ndata, np.int32)
     nrs = data[:, 0]
     elems = data[:, 1:4]
     if nbmark == 1:
@@ -290,39 +364,51 @@ def readFacesBlock(fil, nelems, nbmark):
     return Connectivity(elems, eltype='tri3'), nrs, bmark
 
 
-def readSmeshFacetsBlock(fil, nfacets, nbmark):
+def readSmeshFacetsBlock(fil, nfacets, nbmark, offset=0):
     """Read a tetgen .smesh facets bock.
 
+    The offset is subtracted from the node numbers: use offset=1 if
+    the nodes are numbered from 1.
+
     Returns a tuple of dictionaries with plexitudes as keys:
 
     - elems: for each plexitude a Connectivity array
     - nrs: for each plexitude a list of element numbers in corresponding elems
 
+    Raises a ValueError for a line with a nonpositive plexitude or with
+    less node numbers than its plexitude.
     """
+    lines = [stripLine(fil.readline()) for i in range(nfacets)]
+    # Parse all the lines at once, and find the start of each facet
+    # in the data from the number of values on each line
+    ndata = np.array([len(line.split()) for line in lines])
+    data = np.fromstring(' '.join(lines), sep=' ', dtype=np.int32)
+    # blank lines are skipped, but keep their facet number
+    lnrs = np.where(ndata > 0)[0]
+    starts = (np.cumsum(ndata) - ndata)[lnrs]
+    plex = data[starts]
+    # each line should hold the plexitude and at least that many nodes
+    invalid = np.where((plex <= 0) | (ndata[lnrs] < plex + 1))[0]
+    if len(invalid) > 0:
+        raise ValueError("Invalid data line:\n%s" % lines[lnrs[invalid[0]]])
+    if offset:
+        data -= offset
+    # bmark currently not read
+
     elems = {}
     nrs = {}
-    for i in range(nfacets):
-        line = fil.readline()
-        line = line.strip()
-        if len(line) > 0:
-            data = np.fromstring(line, sep=' ', dtype=np.int32)
-            nplex = data[0]
-            if nplex > 0:
-                e = data[1:1+nplex]
-                # bmark currently not read
-                addElem(elems, nrs, e, i, nplex)
-            else:
-                raise ValueError("Invalid data line:\n%s" % line)
-
-    for nplex in elems:
+    for nplex in np.unique(plex):
+        nplex = int(nplex)
         if nplex == 3:
             eltype= 'tri3'
         elif nplex == 4:
             eltype = 'quad4'
         else:
             eltype = None
-        elems[nplex] = Connectivity(elems[np], eltype=eltype)
-        nrs[nplex] = np.array(nrs[np])
+        w = plex == nplex
+        ind = starts[w, np.newaxis] + np.arange(1, 1+nplex)
+        elems[nplex] = Connectivity(data[ind], eltype=eltype)
+        nrs[nplex] = lnrs[w]
     return elems, nrs
 
 
@@ -331,10 +417,10 @@ def readNeigh(fn):
 
     Returns an array containing the tetrahedra neighbours:
     """
-    fil = open(fn, 'r')
-    line = fil.readline()
-    nelems, nneigh = [int(i) for i in line.strip('\n').split()]
-    elems = np.fromfile(fil, sep=' ', dtype=np.int32).reshape((nelems, nneigh+1))
+    with open(fn, 'r') as fil:
+        line = fil.readline()
+        nelems, nneigh = [int(i) for i in line.strip('\n').split()]
+        elems = readDataBlock(fil, nelems, nneigh+1, np.int32)
     return elems[:, 1:]
 
 
@@ -358,10 +444,10 @@ def writeSmesh(fn, facets, coords=None, holes=None, regions=None):
             fil.write("0  3  0  0  # coords are found in %s.node.\n")
         fil.write("# part 2: facet list.\n")
         fil.write("%s 0\n" % facets.shape[0])
-        for i, n in enumerate(facets):
-            # adding comments breaks fast readback
-            # fil.write("3 %s %s %s # %s\n" % (n[0],n[1],n[2],i))
-            fil.write("3 %s %s %s\n" % (n[0], n[1], n[2]))
+        # adding comments breaks fast readback
+        facets = np.asarray(facets).reshape((-1, 3))
+        plex = np.full((facets.shape[0], 1), 3, dtype=facets.dtype)
+        writeData(fil, np.column_stack([plex, facets]), fmt='%s', sep=' ')
         fil.write("# part 3: hole list.\n")
         if holes is None:
             fil.write("0\n")
@@ -379,8 +465,8 @@ def writeTmesh(fn, elems, offset=0):
     elems = asarray(elems).reshape((-1, 4))
     with open(fn, 'w') as fil:
         fil.write("%d %d 0\n" % elems.shape)
-        for i, e in  enumerate(elems):
-            fil.write('%d %d %d %d %d\n'%(i, e[0], e[1], e[2], e[3]))
+        nrs = np.arange(elems.shape[0]).reshape(-1, 1)
+        writeData(fil, np.column_stack([nrs, elems]), fmt='%d', sep=' ')
         fil.write("# Generated by pyFormex\n")
 
 
@@ -473,7 +559,7 @@ def readTetgen(fn):
             elems = readEleFile(fn)[0]
         elif ext == '.face':
             elems = readFaceFile(fn)[0]
-        if nodenrs.min() == 1 and nodenrs.max()==nodenrs.size:
+        if nodeOffset(nodenrs):
             elems = elems-1
         M = Mesh(nodes, elems, eltype=elems.eltype)
         res['tetgen'+ext] = M
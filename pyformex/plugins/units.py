@@ -29,6 +29,8 @@
 This module uses the standard UNIX program 'units' (available from
 http://www.gnu.org/software/units/units.html) to do the actual conversions.
 Obviously, it will only work on systems that have this program available.
+The availability is only checked when a conversion actually needs
+the 'units' program.
 
 If you really insist on running another OS lacking the units command,
 have a look at http://home.tiscali.be/be052320/Unum.html and make an
@@ -36,9 +38,155 @@ implementation based on unum. If you GPL it and send it to me, I might
 include it in this distribution.
 """
 
+import atexit
+import functools
+import json
+import os
+import re
+import shutil
+from types import MappingProxyType
+
+import pyformex as pf
 from pyformex import utils
-utils.External.require('units')
 
+# The persistent cache of conversions, loaded on first use
+_stored = None
+# Whether _stored has conversions that are not yet saved
+_dirty = False
+
+# Simple SI units that are converted without running 'units':
+# name: (factor to m-kg-s, (length, mass, time) dimensions)
+_si_base = {
+    'm': (1., (1, 0, 0)),
+    'g': (1.e-3, (0, 1, 0)),
+    'N': (1., (1, 1, -2)),
+    'Pa': (1., (-1, 1, -2)),
+}
+_si_prefix = {'n': 1.e-9, 'u': 1.e-6, 'm': 1.e-3, 'c': 1.e-2,
+              'k': 1.e3, 'M': 1.e6, 'G': 1.e9}
+_si_units = dict(
+    [(p+b, (f*v[0], v[1])) for b, v in _si_base.items()
+     for p, f in _si_prefix.items()] +
+    list(_si_base.items()) +
+    [('s', (1., (0, 0, 1))), ('ms', (1.e-3, (0, 0, 1))),
+     ('t', (1.e3, (0, 1, 0)))])
+_re_si_value = re.compile(
+    r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)?\s*(.*?)\s*$')
+_re_si_unit = re.compile(
+    r'([A-Za-z]+)(?:(?:\*\*|\^)(\d+))?(?:/([A-Za-z]+)(?:(?:\*\*|\^)(\d+))?)?$')
+
+
+def _unitsStamp():
+    """Return an identification of the installed 'units' program.
+
+    Returns a list with the path and modification time of the 'units'
+    executable, or None if it is not found. This does not run 'units'.
+    """
+    path = shutil.which('units')
+    if path is None:
+        return None
+    try:
+        return [path, os.stat(path).st_mtime]
+    except OSError:
+        return None
+
+
+def _storedConversions():
+    """Return the conversions stored by previous pyFormex sessions.
+
+    The conversions are stored in a JSON file in the user's configuration
+    directory, together with the :func:`_unitsStamp` of the 'units'
+    program that computed them. They are not used if another 'units' is
+    installed now. If 'units' is not installed, they are used anyway.
+    """
+    global _stored
+    if _stored is None:
+        _stored = {}
+        fn = pf.cfg['userconfdir'] / 'units.json'
+        if fn.exists():
+            try:
+                with open(fn, 'r') as fil:
+                    data = json.load(fil)
+                stamp = _unitsStamp()
+                if stamp is None or data['units'] == stamp:
+                    _stored = data['conversions']
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                pf.debug(f"Could not load the unit conversions from {fn}: {e}",
+                         pf.DEBUG.MISC)
+    return _stored
+
+
+def _storeConversions(conversions):
+    """Add conversions to the persistent cache.
+
+    conversions is a dict with keys 'From\\nTo' and the converted values.
+    The cache file is not written here, but only once, at exit.
+    """
+    global _dirty
+    _storedConversions().update(conversions)
+    if conversions and not _dirty:
+        _dirty = True
+        atexit.register(_saveConversions)
+
+
+def _saveConversions():
+    """Write the persistent cache of conversions to the cache file.
+
+    This is registered to run at exit if new conversions were added.
+    """
+    global _dirty
+    if not _dirty:
+        return
+    fn = pf.cfg['userconfdir'] / 'units.json'
+    try:
+        fn.parent.mkdir(parents=True, exist_ok=True)
+        with open(fn, 'w') as fil:
+            json.dump({'units': _unitsStamp(),
+                       'conversions': _stored}, fil)
+    except OSError as e:
+        utils.warn(f"Could not save the unit conversions to {fn}: {e}")
+    _dirty = False
+
+
+def _siUnit(s):
+    """Return the SI factor and dimensions of a simple unit expression.
+
+    The expression is a unit, optionally raised to a power with '**' or
+    '^', and optionally divided by another such unit, e.g. 'kN/cm**2'.
+    The units are those in _si_units. Returns None for anything else.
+    """
+    m = _re_si_unit.match(s)
+    if not m:
+        return None
+    num, npow, den, dpow = m.groups()
+    if num not in _si_units or (den and den not in _si_units):
+        return None
+    f, d = _si_units[num]
+    n = int(npow or 1)
+    f, d = f**n, [n*i for i in d]
+    if den:
+        g, e = _si_units[den]
+        n = int(dpow or 1)
+        f, d = f / g**n, [i-n*j for i, j in zip(d, e)]
+    return f, d
+
+
+def _siConvert(From, To):
+    """Convert between simple SI units without running 'units'.
+
+    Returns the converted value as a string formatted like the output
+    of 'units', or None if From or To are not simple SI units, see
+    :func:`_siUnit`, or if they are not conformable.
+    """
+    m = _re_si_value.match(From)
+    fr = _siUnit(' '.join(m.group(2).split()))
+    to = _siUnit(' '.join(To.split()))
+    if fr is None or to is None or fr[1] != to[1]:
+        return None
+    return '%.8g' % (float(m.group(1) or 1) * fr[0] / to[0])
+
+
+@functools.lru_cache(maxsize=1024)
 def convertUnits(From, To):
     """Converts between conformable units.
 
@@ -49,6 +197,18 @@ def convertUnits(From, To):
     This function is merely a wrapper around the GNU 'units' command, which
     should be installed for this function to work.
 
+    The results are cached, so that repeated conversions of the same
+    quantities do not run the 'units' command again. Failed conversions
+    are not cached. Use ``convertUnits.cache_clear()`` to empty the cache.
+    The results are also stored in the file 'units.json' in the user's
+    configuration directory at exit, and reused in later sessions without
+    running 'units', as long as the same 'units' program is installed.
+    Simple conversions between SI units of length, mass, time, force and
+    pressure with the common decimal prefixes, like 'MPa' to 'kN/cm**2',
+    are computed directly, without running 'units'. This includes
+    conversions to the same unit, e.g. from '3 kg' to 'kg'. Other units
+    are always checked by 'units'.
+
     Examples:
 
       >>> convertUnits('25.4cm', 'in')
@@ -61,10 +221,107 @@ def convertUnits(From, To):
       '210000'
 
     """
-    P = utils.system('units \"%s\" \"%s\"' % (From, To))
+    val = _siConvert(From, To)
+    if val is not None:
+        return val
+    key = f"{From}\n{To}"
+    stored = _storedConversions()
+    if key in stored:
+        return stored[key]
+    utils.External.require('units')
+    # terse output is just the converted value
+    P = utils.system(['units', '-t', From, To])
     if P.returncode:
         raise RuntimeError('Could not convert units from \"%s\" to \"%s\"' % (From, To))
-    return str(P.stdout.split()[1])
+    val = P.stdout.strip()
+    _storeConversions({key: val})
+    return val
+
+
+def convertUnitsBatch(pairs):
+    """Convert many quantities with a single run of the 'units' command.
+
+    Parameters
+    ----------
+    pairs: list of tuple (str, str)
+        A list of (From, To) tuples, each being a valid set of arguments
+        for :func:`convertUnits`.
+
+    Returns
+    -------
+    list of str
+        The converted values, in the same order as `pairs`.
+
+    Notes
+    -----
+    Starting the 'units' command takes far more time than doing the
+    conversion. Therefore all the conversions are passed on the standard
+    input of a single 'units' process, and the terse output contains
+    a single value per conversion. Simple SI conversions and conversions
+    found in the persistent cache of :func:`convertUnits` are not passed
+    to 'units'. If the output does
+    not exactly match the input, e.g. because one of the conversions
+    failed, the conversions are done one by one with :func:`convertUnits`,
+    which raises a RuntimeError for the offending conversion.
+
+    Examples
+    --------
+    >>> convertUnitsBatch([('25.4cm', 'in'), ('31e6mg', 'kg')])
+    ['10', '31']
+    """
+    pairs = list(pairs)
+    keys = [f"{From}\n{To}" for From, To in pairs]
+    stored = _storedConversions()
+    values = {}
+    for key, (From, To) in zip(keys, pairs):
+        if key not in values:
+            val = _siConvert(From, To)
+            values[key] = stored.get(key) if val is None else val
+    todo = [key for key in values if values[key] is None]
+    if todo:
+        utils.External.require('units')
+        P = utils.system(['units', '-t', '-q'],
+                         input=''.join(key + '\n' for key in todo))
+        res = P.stdout.split('\n')[:-1] if P.stdout else []
+        if P.returncode or len(res) != len(todo) or not all(
+                _isValue(r) for r in res):
+            return [convertUnits(From, To) for From, To in pairs]
+        new = dict(zip(todo, (r.strip() for r in res)))
+        _storeConversions(new)
+        values.update(new)
+    return [values[key] for key in keys]
+
+
+def _isValue(s):
+    """Check that a string is a single numerical value"""
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+
+# The predefined units systems, shared read-only by all UnitsSystem
+# instances. Use UnitsSystem.Predefined to get a modifiable copy.
+_predefined = {
+    'international': MappingProxyType({
+        'length': 'm', 'mass': 'kg', 'force': 'N', 'pressure': 'Pa',
+        'density': 'kg/m^3', 'time': 's', 'acceleration': 'm/s^2',
+        'temperature': 'tempC', 'degrees': 'K'}),
+    'engineering': MappingProxyType({
+        'length': 'mm', 'mass': 't', 'force': 'N', 'pressure': 'MPa',
+        'density': 't/mm^3', 'time': 's', 'acceleration': 'mm/s^2',
+        'temperature': 'tempC', 'degrees': 'K'}),
+    'user-defined': MappingProxyType({}),
+}
+
+
+def _predefinedSystem(system):
+    """Return the shared read-only mapping of a predefined units system"""
+    try:
+        return _predefined[system.lower()]
+    except KeyError:
+        raise RuntimeError("Undefined Units system '%s'" % system) from None
 
 
 class UnitsSystem():
@@ -98,33 +355,27 @@ class UnitsSystem():
 
     def Add(self, un):
         """Add the units from dictionary un to the units system"""
-        for key, val in un.items():
-            self.units[key] = val
-
-    def Predefined(self, system):
-        """Returns the predefined units for the specified system"""
-        if system == 'international':
-            return self.International()
-        elif system == 'engineering':
-            return self.Engineering()
-        elif system == 'user-defined':
-            return {}
-        else:
-            raise RuntimeError("Undefined Units system '%s'" % system)
+        self.units.update(un)
+
+    @staticmethod
+    def Predefined(system):
+        """Returns the predefined units for the specified system
 
+        The system name is case insensitive.
+        """
+        return _predefinedSystem(system).copy()
 
-    def International(self):
+
+    @staticmethod
+    def International():
         """Returns the international units system."""
-        return {'length': 'm', 'mass': 'kg', 'force': 'N', 'pressure': 'Pa',
-                'density': 'kg/m^3', 'time': 's', 'acceleration': 'm/s^2',
-                'temperature': 'tempC', 'degrees': 'K'}
+        return _predefined['international'].copy()
 
 
-    def Engineering(self):
+    @staticmethod
+    def Engineering():
         """Returns a consistent engineering units system."""
-        return {'length': 'mm', 'mass': 't', 'force': 'N', 'pressure': 'MPa',
-                'density': 't/mm^3', 'time': 's', 'acceleration': 'mm/s^2',
-                'temperature': 'tempC', 'degrees': 'K'}
+        return _predefined['engineering'].copy()
 
 
     def Read(self, filename):
@@ -137,10 +388,11 @@ class UnitsSystem():
         A 'problem: system' line sets all units to the corresponding value of
         the specified units system.
         """
-        fil = open(filename, 'r')
+        with open(filename, 'r') as fil:
+            lines = fil.read().splitlines()
         self.units = {}
-        for line in fil:
-            if line[0] == '#':
+        for line in lines:
+            if line[:1] == '#':
                 continue
             s = line.split()
             if len(s) == 2:
@@ -148,10 +400,9 @@ class UnitsSystem():
                 key = key.rstrip(':').lower()
                 self.units[key] = val
                 if key == 'problem':
-                    self.Add(self.Predefined(val.lower()))
+                    self.Add(_predefinedSystem(val))
             else:
                 print("Ignoring line : %s" % line)
-        fil.close()
 
 
     def Get(self, ent):
@@ -168,12 +419,9 @@ class UnitsSystem():
         returns: ``['m', 'kg', 'float']``
         """
         if isinstance(ent, list):
-            return [self.Get(e) for e in ent]
+            return [self.units.get(e, e) for e in ent]
         else:
-            if ent in self.units:
-                return self.units[ent]
-            else:
-                return ent
+            return self.units.get(ent, ent)
 
 
 ### End
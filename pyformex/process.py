@@ -266,6 +266,8 @@ def run(args, *, input=None, capture_output=True, timeout=None,
     if capture_output and 'stdout' not in kargs and 'stderr' not in kargs:
         kargs['stdout'] = subprocess.PIPE
         kargs['stderr'] = subprocess.PIPE
+    if input is not None:
+        kargs['stdin'] = subprocess.PIPE
     kargs.setdefault('encoding', 'utf-8')
     for f in ['stdin', 'stdout', 'stderr']:
         if f in kargs and isinstance(kargs[f], str):
@@ -579,8 +579,10 @@ class Module(Software):
 
 
 Module('pyformex')
+Module('asyncssh')
 Module('calpy')
 Module('docutils')
+Module('earcut', modname='mapbox_earcut')
 Module('gl2ps', attr='GL2PS_VERSION')
 Module('gnuplot', modname='Gnuplot')
 # Module('ipython', modname='IPython',)
@@ -588,6 +590,7 @@ Module('gnuplot', modname='Gnuplot')
 Module('matplotlib')
 Module('meshio')
 Module('moderngl')
+Module('numba')
 Module('numpy')
 Module('pil', modname='PIL')
 Module('pydicom')